@@ -0,0 +1,197 @@
+"""Scaling benchmark of the StudentDatabase operations
+
+Builds databases of synthetic students (benchmarks/synthetic.py) of every size and
+times adding, saving, loading, looking up, searching and removing students, along
+with the peak memory of a load and the size of the saved files. The results can be
+written to a JSON report and compared with an earlier report used as baseline: the
+script exits with status 1 if any result got worse by more than the threshold, and
+with status 2 if the baseline measured another database format.
+
+Usage:
+    python -m benchmarks.bench_database [--sizes 1000,10000,100000,1000000] [--format json]
+                                        [--output report.json] [--baseline baseline.json] [--threshold 0.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import generate_students
+from ecs.modules.Student import Student
+from ecs.modules.StudentDatabase import open_database
+
+
+# Lookups and searches timed per size, spread over the whole database
+QUERIES = 1000
+PARTIAL_QUERIES = 100
+
+# Read-only lookups are repeated and the fastest pass is kept, to reduce the noise
+REPEAT = 3
+
+# Results of every size, as (key, label, unit)
+METRICS = [
+    ("add_student_us", "add_student", "µs/op"),
+    ("save_ms", "save_to_file", "ms"),
+    ("load_ms", "load_from_file", "ms"),
+    ("find_by_user_id_us", "find_by_user_id", "µs/op"),
+    ("find_by_name_us", "find_by_name", "µs/op"),
+    ("search_partial_first_ms", "search_partial_name, 1st", "ms"),
+    ("search_partial_name_us", "search_partial_name", "µs/op"),
+    ("remove_student_by_id_us", "remove_student_by_id", "µs/op"),
+    ("peak_memory_mb", "peak memory of a load", "MB"),
+    ("file_size_mb", "file size", "MB"),
+]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hide the messages the database prints while an operation is timed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def per_op(function, arguments, repeat=1):
+    """Average time in µs of calling function with each of arguments, the best of repeat passes"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(arguments) * 1e6
+
+
+def bench_size(size, extension, work_dir):
+    """Results of every operation on a database of size students"""
+    db_file = os.path.join(work_dir, f"bench_{size}{extension}")
+    students = [Student(**student) for student in generate_students(size)]
+    rng = random.Random(size)
+    results = {}
+
+    with quiet():
+        db = open_database(db_file, auto_load=False)
+        results["add_student_us"] = per_op(db.add_student, students)
+
+        start = time.perf_counter()
+        db.save_to_file()
+        results["save_ms"] = (time.perf_counter() - start) * 1000
+        db.close()
+        results["file_size_mb"] = os.path.getsize(db_file) / 1e6
+        del db
+
+        start = time.perf_counter()
+        db = open_database(db_file)
+        results["load_ms"] = (time.perf_counter() - start) * 1000
+
+    sample = rng.sample(students, min(QUERIES, size))
+    results["find_by_user_id_us"] = per_op(db.find_by_user_id, [student.user_id for student in sample], REPEAT)
+    results["find_by_name_us"] = per_op(db.find_by_name, [student.name for student in sample], REPEAT)
+
+    # Parts of names, e.g. a surname without its first letters
+    partials = [student.name[2:8] for student in sample[:PARTIAL_QUERIES]]
+    start = time.perf_counter()
+    db.search_partial_name(partials[0])
+    results["search_partial_first_ms"] = (time.perf_counter() - start) * 1000
+    results["search_partial_name_us"] = per_op(db.search_partial_name, partials, REPEAT)
+
+    with quiet():
+        results["remove_student_by_id_us"] = per_op(db.remove_student_by_id, [student.user_id for student in sample])
+    db.close()
+    del db, students, sample
+
+    # Measured on its own, tracemalloc slows down everything it traces
+    with quiet():
+        tracemalloc.start()
+        db = open_database(db_file)
+        results["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        db.close()
+
+    return results
+
+
+def compare(report, baseline, threshold):
+    """Results of report that are more than threshold (a fraction) worse than in baseline
+
+    Returns (regressions, sizes of report that are not in baseline).
+    """
+    regressions = []
+    missing = []
+    for size, results in report["results"].items():
+        old_results = baseline.get("results", {}).get(size)
+        if old_results is None:
+            missing.append(size)
+            continue
+        for key, label, unit in METRICS:
+            old, new = old_results.get(key), results.get(key)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f"{size:>9} students  {label:<26} {old:10.2f} -> {new:10.2f} {unit} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the StudentDatabase operations at several sizes.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated database sizes (default: 1000,10000,100000,1000000)")
+    parser.add_argument("--format", choices=["json", "ndjson", "sqlite"], default="json", help="Database format (default: json)")
+    parser.add_argument("--output", metavar="FILE", help="Write the results to a JSON report")
+    parser.add_argument("--baseline", metavar="FILE", help="Report of an earlier run to compare the results with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown or growth counted as a regression (default: 0.2, i.e. 20%%)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "format": args.format,
+        "results": {}
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            print(f"Benchmarking {size} students...", file=sys.stderr)
+            report["results"][str(size)] = bench_size(size, "." + args.format, work_dir)
+
+    print(f"\n{'Students':<34}" + "".join(f"{size:>12}" for size in sizes))
+    for key, label, unit in METRICS:
+        values = "".join(f"{report['results'][str(size)][key]:>12.2f}" for size in sizes)
+        print(f"{label + ' (' + unit + ')':<34}{values}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        # Reports written before the format was recorded are of the default JSON backend
+        baseline_format = baseline.get("format", "json")
+        if baseline_format != report["format"]:
+            print(f"\nCannot compare: {args.baseline} measured the {baseline_format} format, this run the {report['format']} format")
+            sys.exit(2)
+        for field in ("python", "platform"):
+            if baseline.get(field) != report[field]:
+                print(f"\nWarning: {args.baseline} was made with {field} {baseline.get(field)}, this run with {report[field]}, "
+                      f"the timings may not be comparable")
+
+        regressions, missing = compare(report, baseline, args.threshold)
+        if missing:
+            print(f"\nNot compared, no results in {args.baseline} for: {', '.join(missing)} students")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold * 100:.0f}% compared with {args.baseline}:")
+            for regression in regressions:
+                print(regression)
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold * 100:.0f}% compared with {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
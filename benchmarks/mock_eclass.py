@@ -0,0 +1,320 @@
+"""Local stand-in for the eClass and SSO servers, to test scraping offline
+
+Serves the pages the scrapers read: the CAS login form and the login, my_courses.php,
+the course pages, the userslist.php DataTables JSON and the profile pages of synthetic
+students (benchmarks/synthetic.py), every course with its own students. Responses can
+be delayed by a latency with jitter, and a fraction of the user list and profile
+requests can fail with 500 or be throttled with 429 and a Retry-After header, to
+measure the scraping throughput and the effect of --workers, --connections and --rate.
+Request counts are served as JSON on /__stats and printed when the server stops.
+
+Usage:
+    python -m benchmarks.mock_eclass [--port 8080] [--users 1000] [--courses 3] [--latency MS] [--jitter MS]
+                                     [--error-rate 0.01] [--throttle-rate 0.02] [--retry-after SECONDS] [--seed N]
+
+Then scrape it with any username and password:
+    ECLASS_USERNAME=mock ECLASS_PASSWORD=mock ecs --scrape --base-url http://127.0.0.1:8080 --course MOCK1 --mode fresh
+"""
+import argparse
+import collections
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from benchmarks.synthetic import generate_students
+
+
+EXECUTION_TOKEN = "e1s1-mock-execution-token"
+
+PAGE = """<!DOCTYPE html>
+<html lang="el">
+<head>
+    <meta charset="utf-8">
+    <title>{title} | eClass ΟΠΑ</title>
+    <link href="/template/modern/css/bootstrap.min.css?v=3.15" rel="stylesheet">
+</head>
+<body>
+<div id="wrapper">
+    <nav class="navbar navbar-default" id="header">
+        <ul class="nav navbar-nav navbar-right">
+            <li><a href="/main/portfolio.php">Χαρτοφυλάκιο</a></li>
+            <li><a href="/modules/auth/logout.php">Αποσύνδεση</a></li>
+        </ul>
+    </nav>
+    <div class="row">
+        <div id="leftnav" class="col-md-3">
+            <ul class="list-group">
+{menu}
+            </ul>
+        </div>
+        <div id="main-content" class="col-md-9">
+{content}
+        </div>
+    </div>
+    <footer class="footer"><p>Open eClass &copy; 2003-2024 &mdash; Οικονομικό Πανεπιστήμιο Αθηνών</p></footer>
+</div>
+</body>
+</html>
+"""
+
+# Left menu of the pages, so they are about as large as the real ones
+MENU = "\n".join(f'                <li><a href="/modules/{tool}/index.php" class="list-group-item">{tool.title()} tools &amp; settings</a></li>'
+                 for tool in ["announcements", "agenda", "document", "exercise", "forum", "glossary", "gradebook",
+                              "group", "message", "work", "wiki", "video", "questionnaire", "ebook", "attendance"] * 2)
+
+LOGIN_FORM = """<form id="fm1" method="post" action="/login">
+    <input id="username" name="username" type="text">
+    <input id="password" name="password" type="password">
+    <input type="hidden" name="execution" value="{execution}">
+    <input type="hidden" name="_eventId" value="submit">
+    <input type="submit" name="submit" value="Login">
+</form>"""
+
+PROFILE = """            <div class="panel panel-default"><div class="panel-body">
+                <div class="not_visible">{user_id}</div>
+                <div class="col-sm-9">
+                    <h4 class="profile-name">{name}</h4>
+                    <div class="profile-content-panel-text">
+{rows}
+                    </div>
+                </div>
+            </div></div>"""
+
+PROFILE_ROW = """                <div style="line-height:26px;">
+                    <span style="font-weight: bold;">{label}</span>
+                    {value}
+                </div>"""
+
+
+def profile_token(db_id):
+    """Token of a user's profile link"""
+    return hashlib.md5(db_id.encode()).hexdigest()[:10]
+
+
+class MockEClass:
+    """Synthetic courses and the fault injection settings of the mock server
+
+    Args:
+        users: Users of every course
+        courses: Number of courses, with codes MOCK1, MOCK2, ...
+        latency: Delay of every response in ms
+        jitter: Random variation of the delay in ms, up to this much shorter or longer
+        error_rate: Fraction of user list and profile requests answered with 500
+        throttle_rate: Fraction of user list and profile requests answered with 429
+        retry_after: Seconds asked for in the Retry-After header of a 429
+        seed: Random seed of the students and the failures
+    """
+    def __init__(self, users=1000, courses=3, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=0):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()  # "page status" -> requests, and "bytes"
+
+        self.courses = {}  # code -> (name, students)
+        self.profiles = {}  # db_id -> student
+        for number in range(1, courses + 1):
+            students = list(generate_students(users, seed=seed + number))
+            for student in students:
+                # DB-IDs are unique over all courses
+                student["db_id"] = str(number * 10 ** 7 + int(student["db_id"]))
+                self.profiles[student["db_id"]] = student
+            self.courses[f"MOCK{number}"] = (f"Συνθετικό Μάθημα {number}", students)
+
+    def delay(self):
+        """Wait for the configured latency"""
+        with self._lock:
+            seconds = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def fault(self):
+        """Status of an injected failure (429 or 500), or None to answer normally"""
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def count(self, page, status, size):
+        with self._lock:
+            self.stats[f"{page} {status}"] += 1
+            self.stats["bytes"] += size
+
+    def courses_page(self):
+        rows = "\n".join(f'                <tr><td><strong><a href="/courses/{code}/">{html.escape(name)}</a></strong> ({code})</td></tr>'
+                         for code, (name, _) in self.courses.items())
+        content = f"            <h1>Τα μαθήματά μου</h1>\n            <table class=\"table-default\">\n{rows}\n            </table>"
+        return PAGE.format(title="Τα μαθήματά μου", menu=MENU, content=content)
+
+    def user_list(self, code, start, length, echo):
+        """DataTables response with length users of a course from start"""
+        students = self.courses[code][1]
+        rows = []
+        for student in students[start:start + length]:
+            db_id = student["db_id"]
+            link = f"/main/profile/display_profile.php?id={db_id}&amp;token={profile_token(db_id)}"
+            rows.append({
+                "0": f"<a href='{link}'>{student['name']}</a>",
+                "1": f"<small>{student['position']}</small>",
+                "DT_RowId": db_id
+            })
+        return {"sEcho": echo, "iTotalRecords": len(students), "iTotalDisplayRecords": len(students), "aaData": rows}
+
+    def profile_page(self, student):
+        email = student["email"]
+        rows = [("E-mail:", f'<a href="mailto:{email}">{email}</a>' if email else "(e-mail address hidden)")]
+        if student["phone"] != "N/A":
+            rows.append(("Τηλέφωνο:", student["phone"]))
+        rows.append(("Κατηγορία:", student["department"]))
+        rows.append(("Μέλος από:", student["date"]))
+        content = PROFILE.format(user_id=student["user_id"], name=html.escape(student["name"].upper()),
+                                 rows="\n".join(PROFILE_ROW.format(label=label, value=value) for label, value in rows))
+        return PAGE.format(title="Προφίλ χρήστη", menu=MENU, content=content)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers one connection's requests, with keep-alive"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, page, status, body, content_type="text/html; charset=utf-8", headers=()):
+        """Send a whole response in one write
+
+        Headers and body in separate small writes can stall keep-alive connections on
+        delayed ACKs, which would be measured as server latency.
+        """
+        data = body.encode("utf-8")
+        lines = [f"HTTP/1.1 {status} {self.responses.get(status, ('',))[0]}",
+                 f"Content-Type: {content_type}", f"Content-Length: {len(data)}", *headers]
+        self.wfile.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+        self.server.mock.count(page, status, len(data))
+
+    def do_GET(self):
+        mock = self.server.mock
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/__stats":
+            self._send("stats", 200, json.dumps(dict(mock.stats)), "application/json")
+            return
+
+        mock.delay()
+        if url.path in ("/", "/index.php"):
+            self._send("home", 200, PAGE.format(title="Αρχική", menu="", content="<h1>eClass</h1>"))
+        elif url.path == "/modules/auth/cas.php":
+            self._send("login form", 200, PAGE.format(title="Σύνδεση", menu="", content=LOGIN_FORM.format(execution=EXECUTION_TOKEN)))
+        elif url.path == "/main/my_courses.php":
+            self._send("courses", 200, mock.courses_page())
+        elif url.path.startswith("/courses/"):
+            code = url.path.split("/")[2]
+            if code in mock.courses:
+                self._send("course", 200, PAGE.format(title=code, menu=MENU, content=f"<h1>{mock.courses[code][0]}</h1>"))
+            else:
+                self._send("course", 404, "Not found")
+        elif url.path == "/modules/user/userslist.php":
+            if query.get("course") not in mock.courses:
+                self._send("user list", 404, "Not found")
+            elif not self._fault("user list"):
+                page = mock.user_list(query["course"], int(query.get("iDisplayStart", 0)),
+                                      int(query.get("iDisplayLength", 10)), query.get("sEcho", "1"))
+                self._send("user list", 200, json.dumps(page, ensure_ascii=False), "application/json")
+        elif url.path == "/main/profile/display_profile.php":
+            student = mock.profiles.get(query.get("id"))
+            if student is None or query.get("token") != profile_token(student["db_id"]):
+                self._send("profile", 404, "Not found")
+            elif not self._fault("profile"):
+                self._send("profile", 200, mock.profile_page(student))
+        else:
+            self._send("other", 404, "Not found")
+
+    def do_POST(self):
+        mock = self.server.mock
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+
+        mock.delay()
+        if url.path != "/login":
+            self._send("other", 404, "Not found")
+        elif form.get("username") and form.get("password") and form.get("execution") == EXECUTION_TOKEN:
+            self._send("login", 200, PAGE.format(title="Χαρτοφυλάκιο", menu=MENU, content="<h1>Logout</h1>"),
+                       headers=["Set-Cookie: PHPSESSID=mock; Path=/"])
+        else:
+            self._send("login", 401, PAGE.format(title="Σύνδεση", menu="", content=LOGIN_FORM.format(execution=EXECUTION_TOKEN)))
+
+    def _fault(self, page):
+        """Answer with an injected failure if one is drawn, returns whether it did"""
+        status = self.server.mock.fault()
+        if status == 429:
+            self._send(page, 429, "Too Many Requests", "text/plain", [f"Retry-After: {self.server.mock.retry_after}"])
+        elif status == 500:
+            self._send(page, 500, "Internal Server Error", "text/plain")
+        return status is not None
+
+
+def make_server(mock, host="127.0.0.1", port=0):
+    """HTTP server answering with a MockEClass, port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.mock = mock
+    return server
+
+
+def start_server(mock, host="127.0.0.1", port=0):
+    """Serve a MockEClass from a background thread, returns the server and its base URL
+
+    Stop it with server.shutdown().
+    """
+    server = make_server(mock, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic eClass courses locally for scraping benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--users", type=int, default=1000, help="Users of every course (default: 1000)")
+    parser.add_argument("--courses", type=int, default=3, help="Number of courses (default: 3)")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="MS", help="Delay of every response (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0, metavar="MS", help="Random variation of the delay (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of user list and profile requests that fail with 500 (default: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of user list and profile requests throttled with 429 (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=1, metavar="SECONDS", help="Retry-After of throttled requests (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    mock = MockEClass(users=args.users, courses=args.courses, latency=args.latency, jitter=args.jitter,
+                      error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed)
+    server = make_server(mock, args.host, args.port)
+
+    print(f"Serving {args.courses} course(s) ({', '.join(mock.courses)}) of {args.users} users on http://{args.host}:{args.port}")
+    print("Press Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+
+    print("Requests:")
+    for key, requests in sorted(mock.stats.items()):
+        if key != "bytes":
+            print(f"  {key:<20} {requests:>8}")
+    print(f"  {'bytes sent':<20} {mock.stats['bytes']:>8}")
+
+
+if __name__ == "__main__":
+    main()
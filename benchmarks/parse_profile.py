@@ -0,0 +1,69 @@
+"""Micro-benchmark of the profile page parsers
+
+Parses every page in benchmarks/fixtures/ with each parser, checks that all
+parsers agree with the full parse and prints the time per profile. Exits with
+status 1 if a parser disagrees with the full parse on any page.
+
+Usage:
+    python -m benchmarks.parse_profile [--repeat N]
+"""
+import argparse
+import glob
+import os
+import sys
+import timeit
+from ecs.modules.parsers import PARSERS, HAVE_LXML, parse_profile
+
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the profile page parsers.")
+    parser.add_argument("--repeat", type=int, default=200, help="Parses per page and parser (default: 200)")
+    args = parser.parse_args()
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "profile_*.html"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+
+    if not pages:
+        print(f"No fixture pages found in {fixtures_dir}/")
+        return
+
+    print(f"{len(pages)} fixture pages, {args.repeat} parses each\n")
+    print(f"{'Parser':<10} {'µs/profile':>12} {'Speedup':>9}")
+
+    full_time = None
+    mismatches = 0
+    for name in reversed(PARSERS):
+        if name == "lxml" and not HAVE_LXML:
+            print(f"{name:<10} {'(lxml not installed)':>22}")
+            continue
+
+        # Every parser has to produce exactly what the full parse produces
+        for filename, html in pages.items():
+            try:
+                fields = parse_profile(html, name)
+            except ValueError as e:
+                fields = e
+            if fields != parse_profile(html, "full"):
+                print(f"{name:<10} MISMATCH on {filename}")
+                mismatches += 1
+
+        elapsed = 0.0
+        for html in pages.values():
+            elapsed += timeit.timeit(lambda: parse_profile(html, name), number=args.repeat)
+        per_profile = elapsed / (args.repeat * len(pages)) * 1e6
+
+        if full_time is None:
+            full_time = per_profile
+        print(f"{name:<10} {per_profile:>12.1f} {full_time / per_profile:>8.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
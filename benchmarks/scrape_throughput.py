@@ -0,0 +1,123 @@
+"""Scraping throughput against the local mock eClass server
+
+Starts benchmarks/mock_eclass.py in the background and scrapes one of its courses
+with every engine and number of workers, each run into a new data directory, then
+prints the profiles scraped per second, the profile request latencies, the retried
+requests and the failed users. Exits with status 1 if a run lost users, i.e. they
+were neither stored nor counted as failed.
+
+Usage:
+    python -m benchmarks.scrape_throughput [--users 1000] [--latency 50] [--jitter 20] [--error-rate 0.01]
+                                           [--throttle-rate 0.01] [--retry-after 1] [--engines requests,async]
+                                           [--workers 1,8,32] [--connections 8] [--rate 0] [--output report.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from benchmarks.mock_eclass import MockEClass, start_server
+
+
+def scrape(engine, workers, base_url, course, connections, rate, page_size):
+    """Scrape a course of the mock server in the current directory, returns the results of the run"""
+    from ecs.modules.credentials import UserCredentials
+    if engine == "async":
+        from ecs.modules.async_scraper import AsyncClassScraper as Scraper
+        options = {"connections": connections}
+    else:
+        from ecs.modules.scraper import ClassScraper as Scraper
+        options = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        credentials = UserCredentials(base_url=base_url)
+        scraper = Scraper(credentials, workers=workers, rate_limit=rate, page_size=page_size,
+                          course=course, mode="fresh", **options)
+        start = time.perf_counter()
+        scraper.scrape_users()
+        seconds = time.perf_counter() - start
+
+    stats = scraper._stats
+    profiles = scraper.metrics.to_dict()["profile_requests"]
+    return {
+        "engine": engine,
+        "workers": workers,
+        "seconds": seconds,
+        "users_per_second": stats["processed"] / seconds,
+        "processed": stats["processed"],
+        "stored": scraper.student_db.size(),
+        "failed": stats["failed"],
+        "retries": scraper.metrics.retries,
+        "p50_ms": profiles["p50_seconds"] * 1000,
+        "p95_ms": profiles["p95_seconds"] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a local mock eClass server.")
+    parser.add_argument("--users", type=int, default=1000, help="Users of the scraped course (default: 1000)")
+    parser.add_argument("--latency", type=float, default=50.0, metavar="MS", help="Delay of every response (default: 50)")
+    parser.add_argument("--jitter", type=float, default=20.0, metavar="MS", help="Random variation of the delay (default: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail with 500 (default: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests throttled with 429 (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=1, metavar="SECONDS", help="Retry-After of throttled requests (default: 1)")
+    parser.add_argument("--engines", default="requests,async", help="Comma-separated engines (default: requests,async)")
+    parser.add_argument("--workers", default="1,8,32", help="Comma-separated numbers of workers (default: 1,8,32)")
+    parser.add_argument("--connections", type=int, default=8, help="Keep-alive connections of the async engine (default: 8)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Maximum profile requests per second, 0 for no limit (default: 0)")
+    parser.add_argument("--page-size", type=int, default=500, help="Users per page of the user list (default: 500)")
+    parser.add_argument("--output", metavar="FILE", help="Write the results to a JSON report")
+    args = parser.parse_args()
+
+    mock = MockEClass(users=args.users, courses=1, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      throttle_rate=args.throttle_rate, retry_after=args.retry_after)
+    server, base_url = start_server(mock)
+    os.environ.setdefault("ECLASS_USERNAME", "mock")
+    os.environ.setdefault("ECLASS_PASSWORD", "mock")
+
+    # Only errors, the scrapers log every request that fails
+    logging.disable(logging.WARNING)
+    results = []
+    cwd = os.getcwd()
+    try:
+        for engine in args.engines.split(","):
+            for workers in [int(workers) for workers in args.workers.split(",")]:
+                print(f"Scraping {args.users} users with --engine {engine} --workers {workers}...", file=sys.stderr)
+                with tempfile.TemporaryDirectory() as work_dir:
+                    os.chdir(work_dir)
+                    try:
+                        results.append(scrape(engine, workers, base_url, "MOCK1", args.connections, args.rate, args.page_size))
+                    finally:
+                        os.chdir(cwd)
+    finally:
+        server.shutdown()
+        server.server_close()
+        logging.disable(logging.NOTSET)
+
+    print(f"\n{args.users} users, {args.latency:.0f}±{args.jitter:.0f} ms latency, "
+          f"{args.error_rate * 100:.1f}% errors, {args.throttle_rate * 100:.1f}% throttled\n")
+    print(f"{'Engine':<10} {'Workers':>7} {'Seconds':>9} {'Users/s':>9} {'p50 ms':>7} {'p95 ms':>7} {'Stored':>7} {'Failed':>7} {'Retries':>8}")
+    for result in results:
+        print(f"{result['engine']:<10} {result['workers']:>7} {result['seconds']:>9.2f} {result['users_per_second']:>9.1f} {result['p50_ms']:>7.1f} {result['p95_ms']:>7.1f} "
+              f"{result['stored']:>7} {result['failed']:>7} {result['retries']:>8}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"users": args.users, "latency_ms": args.latency, "jitter_ms": args.jitter,
+                       "error_rate": args.error_rate, "throttle_rate": args.throttle_rate, "results": results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    lost = [result for result in results if result["stored"] + result["failed"] != args.users]
+    if lost:
+        for result in lost:
+            print(f"\nFAIL: --engine {result['engine']} --workers {result['workers']} stored {result['stored']} "
+                  f"and failed {result['failed']} of {args.users} users")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cold start budget of ecs --search
+
+Writes a synthetic course database to a temporary data directory, then runs
+ecs --search in a new Python process several times and compares the median wall
+time with a budget. Also checks that importing ecs.cli does not import the
+scraping libraries. Exits with status 1 if the budget is exceeded or a scraping
+library was imported, so it can guard the startup time in a CI job.
+
+Usage:
+    python -m benchmarks.startup_budget [--budget MS] [--runs N] [--count N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import generate_students
+from ecs.modules.Student import Student
+from ecs.modules.StudentDatabase import StudentDatabase
+
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed for scraping, ecs --search should not pay for importing them
+SCRAPING_MODULES = ("requests", "bs4", "dotenv", "aiohttp", "lxml")
+
+
+def run_times(command, cwd, env, runs):
+    """Wall time in ms of every run of a command"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the cold start time of ecs --search against a budget.")
+    parser.add_argument("--budget", type=float, default=250.0, metavar="MS", help="Maximum median wall time of ecs --search (default: 250)")
+    parser.add_argument("--runs", type=int, default=10, help="Number of runs (default: 10)")
+    parser.add_argument("--count", type=int, default=10000, help="Students in the synthetic database (default: 10000)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=repo_dir)
+    env.pop("ECS_TIMINGS", None)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = os.path.join(work_dir, "data")
+        os.makedirs(data_dir)
+        db = StudentDatabase(os.path.join(data_dir, "students_BENCH.json"), auto_load=False)
+        db.add_students(Student(**student) for student in generate_students(args.count))
+        db.save_to_file()
+        search_id = db.get_all_students()[args.count // 2].user_id
+
+        imported = subprocess.run(
+            [sys.executable, "-c", "import sys, ecs.cli; print(' '.join(sorted(m for m in %r if m in sys.modules)))"
+             % (SCRAPING_MODULES,)],
+            cwd=work_dir, env=env, capture_output=True, text=True, check=True).stdout.split()
+
+        interpreter = run_times([sys.executable, "-c", "pass"], work_dir, env, args.runs)
+        search = run_times([sys.executable, "-m", "ecs.cli", "--search", search_id, "--course", "BENCH"],
+                           work_dir, env, args.runs)
+
+    print(f"{args.runs} runs, {args.count} students\n")
+    print(f"{'Command':<22} {'median ms':>10} {'min ms':>8}")
+    print(f"{'python -c pass':<22} {statistics.median(interpreter):>10.1f} {min(interpreter):>8.1f}")
+    print(f"{'ecs --search':<22} {statistics.median(search):>10.1f} {min(search):>8.1f}")
+
+    failed = False
+    if imported:
+        print(f"\nFAIL: importing ecs.cli imports {', '.join(imported)}")
+        failed = True
+    if statistics.median(search) > args.budget:
+        print(f"\nFAIL: ecs --search takes {statistics.median(search):.1f} ms, the budget is {args.budget:.0f} ms")
+        failed = True
+    if not failed:
+        print(f"\nOK: within the {args.budget:.0f} ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Memory benchmark of the Student objects a loaded database keeps
+
+Decodes the records of a synthetic database into Student objects, as loading a
+database does, and reports the memory they take per student with tracemalloc.
+The current Student (slots, shared categorical values) is compared with a plain
+class that stores the same attributes in a per-instance __dict__, which is how
+Student was written before.
+
+Usage:
+    python -m benchmarks.student_memory [--count N]
+"""
+import argparse
+import json
+import tracemalloc
+from benchmarks.synthetic import generate_students
+from ecs.modules.Student import Student
+
+
+class DictStudent:
+    """Student as it was before slots and interning"""
+    def __init__(self, name, user_id, position, email="", phone="", department="N/A",
+                 date="N/A", years="N/A", db_id=""):
+        self.name = name
+        self.user_id = user_id
+        self.position = position
+        self.email = email
+        self.phone = phone
+        self.department = department
+        self.date = date
+        self.years = years
+        self.db_id = db_id
+
+
+def measure(student_class, lines):
+    """Bytes allocated per student to decode lines into student_class objects and keep them"""
+    tracemalloc.start()
+    students = [student_class(**json.loads(line)) for line in lines]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(students) == len(lines)
+    return current / len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory of loaded Student objects.")
+    parser.add_argument("--count", type=int, default=100000, help="Number of synthetic students (default: 100000)")
+    args = parser.parse_args()
+
+    # Every record is decoded from its own JSON text, so no strings are shared by accident
+    lines = [json.dumps(student, ensure_ascii=False) for student in generate_students(args.count)]
+
+    print(f"{args.count} synthetic students\n")
+    print(f"{'Class':<14} {'bytes/student':>14} {'total MB':>10}")
+    before = measure(DictStudent, lines)
+    after = measure(Student, lines)
+    for name, per_student in (("__dict__", before), ("Student", after)):
+        print(f"{name:<14} {per_student:>14.0f} {per_student * args.count / 1e6:>10.1f}")
+    print(f"\n{(1 - after / before) * 100:.0f}% less memory per student")
+
+
+if __name__ == "__main__":
+    main()
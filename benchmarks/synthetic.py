@@ -0,0 +1,77 @@
+"""Synthetic student databases for the benchmarks
+
+Generates reproducible students that look like a scraped course: Greek names with
+accents from small pools (so many students share a surname or a first name), unique
+student IDs and DB-IDs, and a handful of departments, positions and registration
+dates. Each student is a dictionary in the format of Student.to_dict().
+
+Usage:
+    python -m benchmarks.synthetic --count 100000 --output data/students_SYNTH.json
+"""
+import argparse
+import datetime
+import json
+import random
+
+
+LAST_NAMES = ["Παπαδόπουλος", "Παππάς", "Νικολάου", "Γεωργίου", "Κωνσταντινίδης", "Βασιλείου",
+              "Ιωάννου", "Οικονόμου", "Μακρής", "Αλεξίου", "Παναγιωτίδης", "Δημητρίου",
+              "Χριστοδούλου", "Αντωνίου", "Καραγιάννης", "Σταθόπουλος", "Μιχαηλίδης", "Αθανασίου"]
+FIRST_NAMES = ["Γεώργιος", "Μαρία", "Ιωάννης", "Ελένη", "Δημήτριος", "Αικατερίνη", "Νικόλαος",
+               "Σοφία", "Κωνσταντίνος", "Άννα", "Αθανάσιος", "Βασιλική", "Χρήστος", "Ευαγγελία",
+               "Παναγιώτης", "Δέσποινα", "Αλέξανδρος", "Ζωή"]
+DEPARTMENTS = ["Τμήμα Πληροφορικής", "Τμήμα Οικονομικής Επιστήμης", "Τμήμα Στατιστικής",
+               "Τμήμα Λογιστικής και Χρηματοοικονομικής", "Τμήμα Διοικητικής Επιστήμης και Τεχνολογίας",
+               "Τμήμα Μάρκετινγκ και Επικοινωνίας", "Τμήμα Οργάνωσης και Διοίκησης Επιχειρήσεων",
+               "Τμήμα Διεθνών και Ευρωπαϊκών Οικονομικών Σπουδών"]
+
+# "years" is computed as parsers._profile_fields would have on this date, pinned so the
+# students (and the benchmark baselines measured on them) stay the same from year to year
+REFERENCE_DATE = datetime.date(2026, 1, 1)
+
+
+def generate_students(count, seed=0):
+    """Yield count student dictionaries, the same ones for the same seed"""
+    rng = random.Random(seed)
+    user_ids = rng.sample(range(3000000, 3000000 + max(count * 10, 1000000)), count)
+    for i, user_id in enumerate(user_ids):
+        year = rng.randint(2015, 2025)
+        # Some names get a number so that there are fewer exact duplicates
+        suffix = f" {rng.randint(1, 99)}" if rng.random() < 0.5 else ""
+        yield {
+            "name": f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}{suffix}",
+            "user_id": str(user_id),
+            "position": "Φοιτητής" if rng.random() < 0.97 else "Διδάσκων",
+            "email": f"p{user_id}@aueb.gr" if rng.random() < 0.6 else "",
+            "phone": f"69{rng.randrange(10 ** 8):08d}" if rng.random() < 0.05 else "N/A",
+            "department": rng.choice(DEPARTMENTS),
+            "date": f"{rng.randint(1, 28):02d}-{rng.choice((9, 10)):02d}-{year}",
+            "years": str(REFERENCE_DATE.year - year + (1 if REFERENCE_DATE.month >= 9 else 0)),
+            "db_id": str(10000 + i)
+        }
+
+
+def write_database(path, count, seed=0):
+    """Write a synthetic database file in the format StudentDatabase.save_to_file writes"""
+    students = list(generate_students(count, seed))
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith(".ndjson"):
+            for student in students:
+                f.write(json.dumps(student, ensure_ascii=False) + "\n")
+        else:
+            json.dump({'students': students, 'total_count': len(students)}, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic student database.")
+    parser.add_argument("--count", type=int, default=100000, help="Number of students (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--output", required=True, help="Database file to write (.json or .ndjson)")
+    args = parser.parse_args()
+
+    write_database(args.output, args.count, args.seed)
+    print(f"Wrote {args.count} students to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
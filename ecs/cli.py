@@ -1,14 +1,46 @@
+import time
+_started = time.perf_counter()  # Before the other imports, so --timings includes them
+
+# Only the modules the searches need are imported here. The scraper and its HTTP and
+# HTML libraries are imported by --scrape.
 import argparse
+import atexit
+import csv
+import itertools
+import json
 import os
-import glob
+import sys
+from contextlib import redirect_stdout
 from ecs.modules.display import show_banner, show_search_header
-from ecs.modules.scraper import ClassScraper
-from ecs.modules.credentials import UserCredentials
-from ecs.modules.StudentDatabase import StudentDatabase
+from ecs.modules.StudentDatabase import DATABASE_EXTENSIONS, convert_database, course_code_of, find_databases, open_database
+from ecs.modules.catalog import catalog_path, current_entry, load_catalog, rebuild_catalog
+from ecs.modules.global_index import GlobalIndex
+from ecs.modules.parsers import PARSERS
+from ecs.modules.query_daemon import QueryServer, query_daemon
+from ecs.modules.sidecar_index import open_sidecar
+from ecs.modules.Student import Student
+from ecs.modules.timings import Timings
+from ecs.modules.utils import normalize_name
 
 
 data_dir = "data"  # Directory where student databases are stored
 
+timings = Timings(start=_started)  # Phases of the command, printed with --timings
+timings.mark("imports")
+
+
+def normalize_student_id(user_id):
+    """Student ID in the format it is searched with, or None if it is not a valid ID"""
+    # Check if it's only a number (e.g., 1234567)
+    if (len(user_id) == 7 or len(user_id) == 8) and user_id.isdigit():
+        return user_id  # Return the numeric ID as is
+
+    # Check if it starts with a letter followed by digits (e.g., p1234567)
+    if (len(user_id) == 7 or len(user_id) == 8) and user_id[0].isalpha() and user_id[1:].isdigit():
+        return user_id[1:]  # Remove the first character and return just the numbers
+
+    return None
+
 
 def get_valid_student_id(search_id=None):
     """Get and validate a student ID"""
@@ -21,39 +53,42 @@ def get_valid_student_id(search_id=None):
         if not user_id:
             return None  # Empty input, will prompt for name instead
 
-        # Check if it's only a number (e.g., 1234567)
-        if ((len(user_id) == 7 or len(user_id) == 8) and user_id.isdigit()):
-            return user_id  # Return the numeric ID as is
-
-        # Check if it starts with a letter followed by digits (e.g., p1234567)
-        elif (len(user_id) == 7 or len(user_id) == 8 and user_id[0].isalpha() and user_id[1:].isdigit()):
-            return user_id[1:]  # Remove the first character and return just the numbers
+        valid_id = normalize_student_id(user_id)
+        if valid_id:
+            return valid_id
 
         # Invalid format
-        else:
-            print("Invalid ID format. Please enter a student ID (e.g., 1234567 or p1234567)")
-            user_id = input("Student ID: ").strip()
-            search_id = user_id
+        print("Invalid ID format. Please enter a student ID (e.g., 1234567 or p1234567)")
+        user_id = input("Student ID: ").strip()
+        search_id = user_id
 
 
-def select_database():
-    """Let user select which course database to search"""
-    db_files = glob.glob(os.path.join(data_dir, "students_*.json"))
+def select_database(course_code=None):
+    """Let user select which course database to search, or find the one of course_code"""
+    db_files = find_databases(data_dir)
 
     if not db_files:
         print(f"No student databases found in {data_dir}/ directory. Please run --scrape first.")
         return None
 
+    if course_code:
+        for db_file in db_files:
+            if course_code_of(db_file) == course_code:
+                return db_file
+        print(f"No database found for course {course_code} in {data_dir}/ directory.")
+        return None
+
     if len(db_files) == 1:
         return db_files[0]
 
     print("\nAvailable databases:")
+    catalog = load_catalog(data_dir)
     for i, db_file in enumerate(db_files, 1):
-        filename = os.path.basename(db_file)
-        course_code = filename.replace("students_", "").replace(".json", "")
-        # Get database info
-        db = StudentDatabase(db_file)
-        print(f"{i}. {course_code} ({db.size()} students)")
+        course_code = course_code_of(db_file)
+        # Get database info from the catalog
+        course_name, students = database_summary(catalog, db_file)
+        title = f"{course_code} - {course_name}" if course_name else course_code
+        print(f"{i}. {title} ({students} students)")
 
     while True:
         try:
@@ -67,6 +102,181 @@ def select_database():
             print("Please enter a valid number.")
 
 
+def indexed_lookup(db_file, method, keys):
+    """Call a lookup method for every key through the sidecar index of the database
+
+    Only the matching records are read then. If the index is missing or out of date,
+    the database is loaded once and the same method of the database is called.
+    Returns the results in the order of the keys.
+    """
+    index = open_sidecar(db_file)
+    if index is not None:
+        try:
+            with index:
+                return [getattr(index, method)(key) for key in keys]
+        except ValueError:
+            print("Lookup index does not match the database, loading the whole database...")
+    db = open_database(db_file)
+    return [getattr(db, method)(key) for key in keys]
+
+
+def daemon_matches(op, course_code, **params):
+    """(database file, student) matches of a query answered by the query daemon
+
+    course_code None searches every course. Returns None if no daemon is running.
+    """
+    response = query_daemon(data_dir, {"op": op, "course": course_code, **params})
+    if response is None:
+        return None
+    return [(os.path.join(data_dir, match['file']), Student(**match['student'])) for match in response['matches']]
+
+
+def batch_lookup(db_file, lines, chunk_size=1000):
+    """Look up the student ID on every line, yields (line, student or None) pairs
+
+    The IDs are sent to the query daemon in chunks while it is running. Otherwise they
+    are read through the sidecar index while it matches the database, or the database
+    is loaded once. Empty lines are skipped and invalid IDs are not found.
+    """
+    lines = iter(lines)
+    course_code = course_code_of(db_file)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+
+        queries = [line.strip() for line in chunk if line.strip()]
+        search_ids = [normalize_student_id(query) for query in queries]
+        response = query_daemon(data_dir, {"op": "batch", "course": course_code,
+                                           "ids": [search_id for search_id in search_ids if search_id]})
+        if response is None:
+            # No daemon, look this chunk and the rest up here
+            yield from local_batch_lookup(db_file, itertools.chain(chunk, lines))
+            return
+
+        students = iter(response['students'])
+        for query, search_id in zip(queries, search_ids):
+            student = next(students) if search_id else None
+            yield query, Student(**student) if student else None
+
+
+def local_batch_lookup(db_file, lines):
+    """Look up the student ID on every line without the query daemon, like batch_lookup"""
+    index = open_sidecar(db_file)
+    if index is not None:
+        index.load_user_ids()
+    db = None
+    try:
+        for line in lines:
+            query = line.strip()
+            if not query:
+                continue
+
+            search_id = normalize_student_id(query)
+            student = None
+            if search_id and index is not None:
+                try:
+                    student = index.find_by_user_id(search_id)
+                except ValueError:
+                    print("Lookup index does not match the database, loading the whole database...", file=sys.stderr)
+                    index.close()
+                    index = None
+            if search_id and index is None:
+                if db is None:
+                    # Keep the load messages out of the results
+                    with redirect_stdout(sys.stderr):
+                        db = open_database(db_file)
+                student = db.find_by_user_id(search_id)
+
+            yield query, student
+    finally:
+        if index is not None:
+            index.close()
+
+
+class InputError(Exception):
+    """Reading the IDs of --search-file failed"""
+
+
+def read_lines(f):
+    """Lines of an input file, with reading errors raised as InputError"""
+    try:
+        yield from f
+    except (OSError, UnicodeDecodeError) as e:
+        raise InputError(e) from e
+
+
+# Columns of the --search-file results
+RESULT_FIELDS = ["query", "found", "name", "user_id", "position", "email", "phone", "department", "date", "years", "db_id"]
+
+
+def write_results(results, output, output_format):
+    """Write (query, student or None) pairs as CSV or NDJSON rows, returns (rows, found)"""
+    if output_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(RESULT_FIELDS)
+    encoder = json.JSONEncoder(ensure_ascii=False)
+
+    rows = found = 0
+    for query, student in results:
+        record = {"query": query, "found": student is not None}
+        for field in RESULT_FIELDS[2:]:
+            record[field] = getattr(student, field) if student else ""
+
+        if output_format == "csv":
+            record["found"] = "true" if student else "false"
+            writer.writerow(record.values())
+        else:
+            output.write(encoder.encode(record) + "\n")
+        rows += 1
+        found += student is not None
+    return rows, found
+
+
+def database_size(db_file):
+    """Number of students in a database, read from its sidecar index if it is up to date"""
+    index = open_sidecar(db_file)
+    if index is not None:
+        with index:
+            return index.count
+    return open_database(db_file).size()
+
+
+def database_summary(catalog, db_file):
+    """(course name, number of students) of a database
+
+    Read from the catalog if its entry is up to date, otherwise the course name is
+    unknown (None) and the students are counted from the database.
+    """
+    entry = current_entry(catalog, db_file, course_code_of(db_file))
+    if entry:
+        return entry['name'], entry['students']
+    return None, database_size(db_file)
+
+
+def load_global_index():
+    """Load the merged index of all course databases, or None if there are no databases"""
+    index = GlobalIndex(data_dir)
+    if not index.course_count():
+        print(f"No student databases found in {data_dir}/ directory. Please run --scrape first.")
+        return None
+    return index
+
+
+def print_course_matches(matches, not_found_message):
+    """Print the (database file, student) matches of a search over all courses"""
+    matches = [(db_file, student) for db_file, student in matches if student]
+    if not matches:
+        print(not_found_message)
+        return
+
+    courses = {db_file for db_file, _ in matches}
+    print(f"\nFound {len(matches)} match(es) in {len(courses)} course(s):")
+    for db_file, student in matches:
+        print(f"\nCourse: {course_code_of(db_file)}")
+        format_student_output(student)
+
+
 def format_student_output(student):
     """Format student information for console output"""
     print("+" + "―" * 69 + "+")
@@ -92,30 +302,150 @@ def main():
     parser.add_argument("--scrape", action="store_true", help="Scrape user data and write to file")
     parser.add_argument("--search", metavar="STUDENT_ID", help="Search by student ID")
     parser.add_argument("--name", metavar="LASTNAME_FIRSTNAME", help="Search by student name")
+    parser.add_argument("--name-prefix", metavar="PREFIX", help="List students whose names start with PREFIX")
+    parser.add_argument("--search-file", metavar="PATH", help="Look up every student ID in a file, one per line ('-' for standard input)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv", help="Output format of --search-file (default: csv)")
+    parser.add_argument("--course", metavar="CODE", help="Course code of the database to search, or of the course to scrape, instead of selecting it")
+    parser.add_argument("--all", action="store_true", help="With --search or --name, search every course database instead of selecting one")
+    parser.add_argument("--fuzzy", action="store_true", help="With --name, find the closest names even if they are misspelled")
+    parser.add_argument("--max-distance", type=int, default=2, metavar="N", help="Maximum number of typos tolerated by --fuzzy (default: 2)")
+    parser.add_argument("--limit", type=int, default=10, metavar="N", help="Maximum number of results of --fuzzy and --name-prefix (default: 10)")
+    parser.add_argument("--serve", action="store_true", help="Keep the databases in data/ loaded and answer searches from other ecs commands until stopped")
     parser.add_argument("--info", action="store_true", help="Show database information")
+    parser.add_argument("--rebuild-catalog", action="store_true", help="Recreate data/catalog.json from the databases in data/")
+    parser.add_argument("--migrate", nargs="?", const="sqlite", choices=["sqlite", "ndjson"], help="Convert the databases in data/ to indexed SQLite databases (default) or to NDJSON files")
+    parser.add_argument("--engine", choices=["requests", "async"], default="requests", help="Scraping backend (default: requests)")
+    parser.add_argument("--workers", type=int, metavar="N", help="Number of profiles to fetch in parallel while scraping (default: 1, or 100 with --engine async)")
+    parser.add_argument("--page-size", type=int, default=500, metavar="N", help="Users requested per page of the course's user list (default: 500)")
+    parser.add_argument("--cache", action="store_true", help="Keep downloaded profile pages in data/cache/ and reuse them on later scrapes")
+    parser.add_argument("--cache-ttl", type=int, default=86400, metavar="SECONDS", help="Age after which cached profile pages are revalidated (default: 86400)")
+    parser.add_argument("--cache-size", type=int, default=100, metavar="MB", help="Maximum size of the profile page cache (default: 100)")
+    parser.add_argument("--parser", choices=PARSERS, default="auto", help="Profile page parser (default: auto, the fastest one that understands the page)")
+    parser.add_argument("--journal", action="store_true", help="Append database changes to a journal instead of rewriting the whole JSON database")
+    parser.add_argument("--connections", type=int, default=8, metavar="N", help="Keep-alive connections used by --engine async (default: 8)")
+    parser.add_argument("--mode", choices=["update", "incremental", "fresh"], help="With --scrape, what to do with an existing database of the course instead of asking")
+    parser.add_argument("--base-url", metavar="URL", help="eClass server to scrape (default: ECLASS_BASE_URL or https://eclass.aueb.gr), e.g. a local benchmarks/mock_eclass.py")
+    parser.add_argument("--metrics-json", metavar="FILE", help="With --scrape, write the scrape's timings, latencies, bytes and retries to a JSON file")
+    parser.add_argument("--metrics-prom", metavar="FILE", help="With --scrape, write the same metrics as a Prometheus textfile (e.g. for node_exporter's textfile collector)")
+    parser.add_argument("--rate", type=float, default=5.0, metavar="REQ_PER_SEC", help="Maximum profile requests per second while scraping (default: 5)")
+    parser.add_argument("--timings", action="store_true", help="Print the time spent importing modules and in every phase of the command (also enabled by ECS_TIMINGS=1)")
     args = parser.parse_args()
 
-    show_banner()
+    if args.timings:
+        timings.enabled = True
+    atexit.register(timings.report)
+    timings.mark("parse arguments")
+
+    if args.all and args.fuzzy:
+        parser.error("--fuzzy cannot be combined with --all")
+    if args.all and args.search_file:
+        parser.error("--search-file cannot be combined with --all")
+    if args.limit < 1:
+        parser.error("--limit must be at least 1")
+
+    # The results of --search-file go to standard output, so the banner is left out
+    if args.search_file is None:
+        show_banner()
+
+    if args.search_file is not None:
+        # The database menu can't be answered when the IDs are read from standard input
+        if args.search_file == "-" and not args.course and len(find_databases(data_dir)) > 1:
+            parser.error("--search-file - needs --course when there are several databases")
+
+        # Messages go to standard error, standard output only gets the results
+        with redirect_stdout(sys.stderr):
+            db_file = select_database(args.course)
+        if not db_file:
+            return
+        timings.mark("select database")
+
+        try:
+            input_file = sys.stdin if args.search_file == "-" else open(args.search_file, 'r', encoding='utf-8')
+        except OSError as e:
+            print(f"Error reading {args.search_file}: {e}", file=sys.stderr)
+            return
+
+        try:
+            rows, found = write_results(batch_lookup(db_file, read_lines(input_file)), sys.stdout, args.format)
+            sys.stdout.flush()
+        except InputError as e:
+            print(f"Error reading {args.search_file}: {e}", file=sys.stderr)
+            return
+        except BrokenPipeError:
+            # Whoever reads the results stopped early, e.g. ecs --search-file ids.txt | head.
+            # Standard output goes to /dev/null so that the flush at exit does not fail again.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+        timings.mark("lookups and output")
+        print(f"Looked up {rows} ID(s) in {course_code_of(db_file)}: {found} found, {rows - found} not found", file=sys.stderr)
+
+    elif args.scrape:
+        from ecs.modules.cache import ResponseCache
+        from ecs.modules.credentials import UserCredentials
+        from ecs.modules.scraper import ClassScraper
+        timings.mark("import scraper")
 
-    if args.scrape:
         # Get credentials from the user
-        credentials = UserCredentials()
+        credentials = UserCredentials(base_url=args.base_url)
+
+        cache = None
+        if args.cache:
+            cache = ResponseCache(os.path.join(data_dir, "cache"), ttl=args.cache_ttl, max_bytes=args.cache_size * 1024 * 1024)
 
         # Scrape users from the eclass.aueb.gr website
-        scraper = ClassScraper(credentials)
+        if args.engine == "async":
+            try:
+                from ecs.modules.async_scraper import AsyncClassScraper
+            except ImportError:
+                print("The async engine requires aiohttp. Install it with: pip install aiohttp")
+                return
+            scraper = AsyncClassScraper(credentials, workers=args.workers or 100, rate_limit=args.rate, page_size=args.page_size, cache=cache, parser=args.parser, connections=args.connections, journal=args.journal,
+                                        course=args.course, mode=args.mode)
+        else:
+            scraper = ClassScraper(credentials, workers=args.workers or 1, rate_limit=args.rate, page_size=args.page_size, cache=cache, parser=args.parser, journal=args.journal,
+                                   course=args.course, mode=args.mode)
         scraper.scrape_users()
 
+        try:
+            if args.metrics_json:
+                scraper.metrics.write_json(args.metrics_json)
+                print(f"Metrics written to {args.metrics_json}")
+            if args.metrics_prom:
+                scraper.metrics.write_prometheus(args.metrics_prom)
+                print(f"Metrics written to {args.metrics_prom}")
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
     # Search for a specific user
     elif args.search is not None:
         show_search_header()
 
+        if args.all:
+            search_id = get_valid_student_id(args.search.strip())
+            if not search_id:
+                print("Invalid student ID format.")
+                return
+
+            print(f"Searching all courses for student ID: {search_id}")
+            matches = daemon_matches("lookup", None, id=search_id)
+            if matches is None:
+                index = load_global_index()
+                if not index:
+                    return
+                matches = [(db_file, indexed_lookup(db_file, "find_by_user_id", [search_id])[0])
+                           for db_file in index.find_by_user_id(search_id)]
+            timings.mark("lookup")
+            print_course_matches(matches, f"No student found with ID: {search_id}")
+            return
+
         # Select database to search
-        db_file = select_database()
+        db_file = select_database(args.course)
         if not db_file:
             return
-
-        # Load database
-        db = StudentDatabase(db_file)
+        timings.mark("select database")
 
         # Validate and format the Student ID
         search_id = get_valid_student_id(args.search.strip())
@@ -123,12 +453,17 @@ def main():
             print("Invalid student ID format.")
             return
 
-        filename = os.path.basename(db_file)
-        course_code = filename.replace("students_", "").replace(".json", "")
+        course_code = course_code_of(db_file)
         print(f"Searching for student ID: {search_id}")
 
-        # Search for student
-        student = db.find_by_user_id(search_id)
+        # Search for student through the query daemon if it is running, otherwise the
+        # lookup index avoids loading the whole database
+        matches = daemon_matches("lookup", course_code, id=search_id)
+        if matches is not None:
+            student = matches[0][1] if matches else None
+        else:
+            student = indexed_lookup(db_file, "find_by_user_id", [search_id])[0]
+        timings.mark("lookup")
         if student:
             print(f"\nFound student:")
             format_student_output(student)
@@ -138,32 +473,62 @@ def main():
     elif args.name is not None:
         show_search_header()
 
-        # Select database to search
-        db_file = select_database()
-        if not db_file:
-            return
-
-        # Load database
-        db = StudentDatabase(db_file)
+        # Select database to search, unless all of them are searched
+        if not args.all:
+            db_file = select_database(args.course)
+            if not db_file:
+                return
+            timings.mark("select database")
 
-        filename = os.path.basename(db_file)
-        course_code = filename.replace("students_", "").replace(".json", "")
+            course_code = course_code_of(db_file)
 
-        # Remove the Greek accents from the name
-        search_name = args.name.strip()
-        from ecs.modules.utils import remove_greek_accents
-        search_name = remove_greek_accents(search_name)
+        # Remove the Greek accents, uppercase and collapse the spaces like the database keys
+        search_name = normalize_name(args.name)
 
-        # Format the name
-        search_name = search_name.upper()
+        print(f"Searching for student name: {search_name}")
 
-        # Remove any extra spaces
-        search_name = " ".join(search_name.split())
+        if args.all:
+            matches = daemon_matches("name", None, name=search_name)
+            if matches == []:
+                print("Exact match not found. Trying partial search...")
+                matches = daemon_matches("partial", None, name=search_name)
+            if matches is None:
+                index = load_global_index()
+                if not index:
+                    return
+
+                matches = [(db_file, student) for db_file in index.find_by_name(search_name)
+                           for student in indexed_lookup(db_file, "find_by_name", [search_name])[0]]
+                if not matches:
+                    print("Exact match not found. Trying partial search...")
+                    matches = [(db_file, student) for db_file, names in index.search_partial_name(search_name)
+                               for students in indexed_lookup(db_file, "find_by_name", names)
+                               for student in students]
+            timings.mark("lookup")
+            print_course_matches(matches, f"No students found matching: {search_name}")
+            return
 
-        print(f"Searching for student name: {search_name}")
+        if args.fuzzy:
+            db = open_database(db_file)
+            matches = db.find_fuzzy(search_name, max_distance=args.max_distance, limit=args.limit)
+            timings.mark("lookup")
+            if matches:
+                print(f"\nFound {len(matches)} student(s) with similar names:")
+                for distance, student in matches:
+                    print(f"Distance: {distance}")
+                    format_student_output(student)
+            else:
+                print(f"No students found within {args.max_distance} typos of: {search_name}")
+            return
 
-        # Search for students
-        students = db.find_by_name(search_name)
+        # Search for students through the query daemon if it is running, otherwise the
+        # lookup index avoids loading the whole database
+        matches = daemon_matches("name", course_code, name=search_name)
+        if matches is not None:
+            students = [student for _, student in matches]
+        else:
+            students = indexed_lookup(db_file, "find_by_name", [search_name])[0]
+        timings.mark("lookup")
         if students:
             print(f"\nFound {len(students)} student(s):")
             for student in students:
@@ -171,7 +536,13 @@ def main():
         else:
             # Try partial name search
             print("Exact match not found. Trying partial search...")
-            partial_students = db.search_partial_name(search_name)
+            matches = daemon_matches("partial", course_code, name=search_name)
+            if matches is not None:
+                partial_students = [student for _, student in matches]
+            else:
+                db = open_database(db_file)
+                partial_students = db.search_partial_name(search_name)
+            timings.mark("partial search")
             if partial_students:
                 print(f"\nFound {len(partial_students)} student(s) with partial match:")
                 for student in partial_students:
@@ -179,9 +550,50 @@ def main():
             else:
                 print(f"No students found matching: {search_name}")
 
+    elif args.name_prefix is not None:
+        show_search_header()
+
+        # Select database to search
+        db_file = select_database(args.course)
+        if not db_file:
+            return
+
+        # Load database
+        db = open_database(db_file)
+
+        print(f"Searching for names starting with: {args.name_prefix.strip()}\n")
+
+        # Students are listed lazily in name order
+        found = 0
+        for student in db.search_prefix(args.name_prefix, limit=args.limit):
+            print(f"{student.name:<50} {student.user_id}")
+            found += 1
+
+        if not found:
+            print(f"No students found with names starting with: {args.name_prefix.strip()}")
+
+    elif args.migrate:
+        # Only databases in a format that the new one takes precedence over
+        target_extension = "." + args.migrate
+        rank = DATABASE_EXTENSIONS.index
+        source_files = [db_file for db_file in find_databases(data_dir)
+                        if rank(os.path.splitext(db_file)[1]) < rank(target_extension)]
+        if not source_files:
+            print(f"No databases to migrate to {args.migrate} in {data_dir}/ directory.")
+            return
+
+        for source_file in source_files:
+            print(f"\nMigrating {course_code_of(source_file)}...")
+            db = convert_database(source_file, os.path.splitext(source_file)[0] + target_extension)
+            if db is None:
+                print(f"Failed to migrate {source_file}")
+                continue
+            db.close()
+        print(f"\nMigration complete. The old files were kept, the {args.migrate} databases are used from now on.")
+
     elif args.info:
         # Show information about all databases
-        db_files = glob.glob(os.path.join(data_dir, "students_*.json"))
+        db_files = find_databases(data_dir)
         if not db_files:
             print(f"No student databases found in {data_dir}/ directory. Please run --scrape first.")
         else:
@@ -189,16 +601,34 @@ def main():
             print("=" * 50)
             print(f"Data directory: {os.path.abspath(data_dir)}")
             print()
+            catalog = load_catalog(data_dir)
+            outdated = False
             for db_file in db_files:
                 filename = os.path.basename(db_file)
-                course_code = filename.replace("students_", "").replace(".json", "")
-                db = StudentDatabase(db_file)
+                course_code = course_code_of(db_file)
+                entry = current_entry(catalog, db_file, course_code)
                 print(f"\nCourse: {course_code}")
-                print(f"Students: {db.size()}")
+                if entry:
+                    if entry['name']:
+                        print(f"Name: {entry['name']}")
+                    print(f"Students: {entry['students']}")
+                else:
+                    outdated = True
+                    print(f"Students: {database_size(db_file)}")
                 print(f"File: {filename}")
                 file_size = os.path.getsize(db_file) / 1024  # KB
                 print(f"Size: {file_size:.1f} KB")
 
+            if outdated:
+                print(f"\nSome databases are not described by {catalog_path(data_dir)}, run ecs --rebuild-catalog to update it.")
+
+    elif args.serve:
+        QueryServer(data_dir).serve_forever()
+
+    elif args.rebuild_catalog:
+        courses = rebuild_catalog(data_dir)
+        print(f"Catalog rebuilt with {len(courses)} course(s): {catalog_path(data_dir)}")
+
     else:
         # No arguments provided, show help
         parser.print_help()
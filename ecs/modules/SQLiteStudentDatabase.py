@@ -0,0 +1,262 @@
+import sqlite3
+import threading
+from ecs.modules.Student import Student
+from ecs.modules.StudentDatabase import StudentDatabase
+from ecs.modules.bktree import BKTree
+from ecs.modules.catalog import file_hash
+
+
+_COLUMNS = "name, user_id, position, email, phone, department, date, years, db_id"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    position TEXT,
+    email TEXT,
+    phone TEXT,
+    department TEXT,
+    date TEXT,
+    years TEXT,
+    db_id TEXT
+);
+CREATE INDEX IF NOT EXISTS students_name_key ON students (name_key, user_id);
+CREATE INDEX IF NOT EXISTS students_db_id ON students (db_id);
+"""
+
+# Trigram full-text index over the normalized names, kept in sync by triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+    name_key, content='students', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+    INSERT INTO students_fts (rowid, name_key) VALUES (new.rowid, new.name_key);
+END;
+CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+    INSERT INTO students_fts (students_fts, rowid, name_key) VALUES ('delete', old.rowid, old.name_key);
+END;
+CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF name_key ON students BEGIN
+    INSERT INTO students_fts (students_fts, rowid, name_key) VALUES ('delete', old.rowid, old.name_key);
+    INSERT INTO students_fts (rowid, name_key) VALUES (new.rowid, new.name_key);
+END;
+"""
+
+_UPSERT = f"""
+INSERT INTO students (name_key, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    name_key = excluded.name_key, name = excluded.name, position = excluded.position,
+    email = excluded.email, phone = excluded.phone, department = excluded.department,
+    date = excluded.date, years = excluded.years, db_id = excluded.db_id
+"""
+
+
+class SQLiteStudentDatabase(StudentDatabase):
+    """StudentDatabase stored in a SQLite file instead of a JSON file
+
+    Nothing is loaded into memory: every lookup is a query on an indexed table
+    (user_id, normalized name, db_id), and partial names are searched with an FTS5
+    trigram index when the SQLite library supports it. Changes are kept in an open
+    transaction until save_to_file commits them, like the JSON database only writes
+    its file when saved.
+    """
+    def __init__(self, db_file="student_database.sqlite", auto_load=True):
+        self.db_file = db_file
+        self._lock = threading.Lock()  # Incremental scrapes look students up from worker threads
+        self._name_bktree = None  # Normalized names by edit distance, built by the first fuzzy search
+        self.course_name = None  # Full course name, recorded in the catalog when saving
+
+        # Workers only read, writes happen on the main thread
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self._has_fts = True
+        except sqlite3.OperationalError:
+            # No FTS5 or no trigram tokenizer (SQLite < 3.34), partial searches scan instead
+            self._has_fts = False
+
+        if auto_load:
+            self.load_from_file()
+        else:
+            # A fresh database replaces the stored students once it is saved
+            self._execute("DELETE FROM students")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _select(self, where="1", params=(), order="user_id", limit=-1):
+        """Students matching a WHERE clause"""
+        rows = self._execute(f"SELECT {_COLUMNS}, name_key FROM students WHERE {where} ORDER BY {order} LIMIT ?",
+                             (*params, limit))
+        return [Student(*row) for row in rows]
+
+    @staticmethod
+    def _row(student):
+        """Parameters of the upsert statement for a student"""
+        return (student.name_key, student.name, student.user_id, student.position, student.email,
+                student.phone, student.department, student.date, student.years, student.db_id)
+
+    def add_student(self, student):
+        """Add or replace a student"""
+        try:
+            self._fill_name_keys((student,))
+            self._execute(_UPSERT, self._row(student))
+            self._name_bktree = None
+            return True
+        except Exception as e:
+            print(f"ERROR: Failed to add student {student.name}: {e}")
+            return False
+
+    def add_students(self, students):
+        """Add many students in one statement, returns the number of students added"""
+        try:
+            # Later records win over earlier ones with the same user_id
+            new_students = {}
+            for student in students:
+                new_students[student.user_id] = student
+
+            self._fill_name_keys(new_students.values())
+            rows = [self._row(student) for student in new_students.values()]
+
+            with self._lock:
+                self._conn.executemany(_UPSERT, rows)
+            self._name_bktree = None
+            return len(new_students)
+        except Exception as e:
+            print(f"ERROR: Failed to add students: {e}")
+            return 0
+
+    def remove_student_by_id(self, user_id):
+        """Remove a student by user_id"""
+        try:
+            with self._lock:
+                removed = self._conn.execute("DELETE FROM students WHERE user_id = ?", (user_id,)).rowcount
+        except Exception as e:
+            print(f"ERROR: Failed to remove student {user_id}: {e}")
+            return False
+
+        if not removed:
+            print(f"WARNING: Student {user_id} not found in database")
+            return False
+        self._name_bktree = None
+        return True
+
+    def find_by_user_id(self, user_id):
+        """Find student by user_id with one primary key lookup"""
+        # Try the exact ID, then with the 'p' prefix added or removed
+        if user_id.startswith('p'):
+            candidates = (user_id, user_id[1:])
+        else:
+            candidates = (user_id, 'p' + user_id)
+
+        for candidate in candidates:
+            result = self._select("user_id = ?", (candidate,), limit=1)
+            if result:
+                return result[0]
+
+        # Not found in any format
+        return None
+
+    def find_by_db_id(self, db_id):
+        """Find student by eClass DB-ID using the db_id index"""
+        result = self._select("db_id = ?", (db_id,), limit=1)
+        return result[0] if result else None
+
+    def find_by_name(self, name):
+        """Find students by name using the normalized name index"""
+        return self._select("name_key = ?", (self._normalize_name(name),))
+
+    def search_partial_name(self, partial_name):
+        """Search for students whose names contain the partial name, using the trigram FTS index"""
+        normalized_partial = self._normalize_name(partial_name)
+
+        # The trigram tokenizer only matches queries of at least three characters
+        if self._has_fts and len(normalized_partial) >= 3:
+            phrase = '"' + normalized_partial.replace('"', '""') + '"'
+            students = self._select("rowid IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)",
+                                    (phrase,), order="name_key, user_id")
+            # The tokenizer folds case, keep only exact substring matches
+            return [student for student in students
+                    if normalized_partial in student.name_key]
+
+        return self._select("instr(name_key, ?) > 0", (normalized_partial,), order="name_key, user_id")
+
+    def search_prefix(self, prefix, limit=None):
+        """Yield the students whose names start with prefix, in name order, using the name index
+
+        An empty prefix walks the whole index. A limit of 0 or less yields no students.
+        """
+        if limit is not None and limit <= 0:
+            return
+        normalized_prefix = self._normalize_name(prefix)
+        yield from self._select("name_key >= ? AND name_key < ?",
+                                (normalized_prefix, normalized_prefix + "\U0010ffff"),
+                                order="name_key, user_id", limit=limit or -1)
+
+    def find_fuzzy(self, name, max_distance=2, limit=10):
+        """Find the students whose names are closest to name, tolerating typos
+
+        Returns up to limit (distance, student) pairs, closest first. The edit distance
+        tree of the distinct names is built on the first fuzzy search.
+        """
+        normalized_name = self._normalize_name(name)
+
+        if self._name_bktree is None:
+            self._name_bktree = BKTree(row[0] for row in self._execute("SELECT DISTINCT name_key FROM students"))
+
+        results = []
+        for distance, match in self._name_bktree.search(normalized_name, max_distance):
+            for student in self._select("name_key = ?", (match,)):
+                results.append((distance, student))
+                if len(results) == limit:
+                    return results
+
+        return results
+
+    def get_all_students(self):
+        """Get all students sorted by user_id"""
+        return self._select()
+
+    def get_all_students_by_name(self):
+        """Get all students sorted by name"""
+        return self._select(order="name_key, user_id")
+
+    def size(self):
+        """Get total number of students"""
+        return self._execute("SELECT COUNT(*) FROM students")[0][0]
+
+    def clear(self):
+        """Clear all data"""
+        print(f"DEBUG: Clearing database (had {self.size()} students)")
+        self._execute("DELETE FROM students")
+        self._name_bktree = None
+
+    def save_to_file(self):
+        """Commit the pending changes to the SQLite file"""
+        try:
+            with self._lock:
+                self._conn.commit()
+            self._update_catalog(self.size(), file_hash(self.db_file))
+            print(f"Database saved to {self.db_file} ({self.size()} students)")
+            return True
+        except Exception as e:
+            print(f"Error saving database: {e}")
+            return False
+
+    def load_from_file(self):
+        """Discard the changes that were not saved, the students themselves stay on disk"""
+        try:
+            with self._lock:
+                self._conn.rollback()
+            self._name_bktree = None
+            return True
+        except Exception as e:
+            print(f"Error loading database: {e}")
+            return False
+
+    def close(self):
+        """Close the connection, discarding the changes that were not saved"""
+        self._conn.close()
+
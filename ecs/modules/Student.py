@@ -1,16 +1,36 @@
 
+import sys
+
+
+# Values that hidden or missing contact details are stored as
+_PLACEHOLDERS = ("", "N/A")
+
+
+def _intern(value):
+    """The shared copy of a string value, so equal values are stored once"""
+    return sys.intern(value) if type(value) is str else value
+
+
 class Student:
+    # No per-instance __dict__, the attributes are stored in fixed slots
+    __slots__ = ("name", "user_id", "position", "email", "phone", "department", "date", "years", "db_id",
+                 "name_key")
+
     def __init__(self, name, user_id, position, email="", phone="", department="N/A", 
-                 date="N/A", years="N/A", db_id=""):
+                 date="N/A", years="N/A", db_id="", name_key=None):
         self.name = name
         self.user_id = user_id
-        self.position = position
-        self.email = email
-        self.phone = phone
-        self.department = department
-        self.date = date
-        self.years = years
+        # These repeat across students, every distinct value is kept only once
+        self.position = _intern(position)
+        self.email = _intern(email) if email in _PLACEHOLDERS else email
+        self.phone = _intern(phone) if phone in _PLACEHOLDERS else phone
+        self.department = _intern(department)
+        self.date = _intern(date)
+        self.years = _intern(years)
         self.db_id = db_id
+        # Normalized name the databases index the student by, filled in when it is added
+        # to one and saved with the student so it is not computed again on load
+        self.name_key = name_key
 
     def __str__(self):
         return f"Student(name='{self.name}', user_id='{self.user_id}', position='{self.position}, email='{self.email}', phone='{self.phone}', department='{self.department}', date='{self.date}', years='{self.years}', db_id='{self.db_id}')"
@@ -29,5 +49,6 @@ class Student:
             "department": self.department,
             "date": self.date,
             "years": self.years,
-            "db_id": self.db_id
+            "db_id": self.db_id,
+            "name_key": self.name_key
         }
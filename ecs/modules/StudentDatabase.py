@@ -1,17 +1,39 @@
+import glob
+import hashlib
 import json
 import os
+import zlib
 from collections import defaultdict
-import bisect
+from json.encoder import encode_basestring
 from ecs.modules.Student import Student
+from ecs.modules.bktree import BKTree
+from ecs.modules.catalog import update_catalog
+from ecs.modules.journal import Journal, journal_path
+from ecs.modules.json_stream import iter_json_array, iter_ndjson
+from ecs.modules.ngram_index import TrigramIndex
+from ecs.modules.sidecar_index import remove_sidecar, write_sidecar
+from ecs.modules.sorted_index import SortedIndex
+from ecs.modules.utils import gc_paused, normalize_name, normalize_names
 
 
 class StudentDatabase:
-    def __init__(self, db_file="student_database.json", auto_load=True):
+    def __init__(self, db_file="student_database.json", auto_load=True, journal=False, compact_bytes=1024 * 1024):
         self.db_file = db_file
-        self._by_user_id = []  # O(1) average case
-        self._by_name = []  # O(1) average case
+        self._by_user_id = SortedIndex()  # user_id -> student, O(log n) insert/delete
+        self._by_name = SortedIndex()  # (normalized name, user_id) -> student, O(log n) insert/delete
         self._user_id_dict = {}
         self._name_dict = defaultdict(list)  # Multiple students might have same name
+        self._db_id_dict = {}  # eClass DB-ID of each student, used by incremental scrapes
+        self._name_trigrams = None  # Normalized names by trigram, built by the first partial name search
+        self._name_bktree = None  # Normalized names by edit distance, built by the first fuzzy search
+        self.course_name = None  # Full course name, recorded in the catalog when saving
+
+        # In journal mode changes are appended to the journal as they are made, and the
+        # file is only rewritten once the journal outgrows compact_bytes or half the file
+        self.journal_mode = journal
+        self.compact_bytes = compact_bytes
+        self._journal = Journal(journal_path(db_file))
+        self._needs_snapshot = not auto_load  # A fresh database replaces the file on the next save
 
         # Load existing data only if requested
         if auto_load:
@@ -19,34 +41,54 @@ class StudentDatabase:
 
     def _normalize_name(self, name):
         """Normalize name by removing accents, converting to uppercase, and trimming spaces"""
+        return normalize_name(name)
+
+    @staticmethod
+    def _fill_name_keys(students):
+        """Set the name_key of the students that were not loaded with one, in one batch"""
+        missing = [student for student in students if student.name_key is None]
+        for student, name_key in zip(missing, normalize_names(student.name for student in missing)):
+            student.name_key = name_key
+
+    def _log(self, ops):
+        """Append changes to the journal in journal mode"""
+        if not self.journal_mode or self._needs_snapshot:
+            return
         try:
-            from ecs.modules.utils import remove_greek_accents
-            normalized = remove_greek_accents(name.strip())
-            normalized = normalized.upper()
-            normalized = " ".join(normalized.split())
-            return normalized
+            self._journal.append(ops)
         except Exception as e:
-            print(f"ERROR: Failed to normalize name '{name}': {e}")
-            return name.upper().strip()
+            print(f"WARNING: Failed to write journal, the next save rewrites the database: {e}")
+            self._needs_snapshot = True
 
     def add_student(self, student):
         """Add a student to all data structures"""
+        added = self._add_student(student)
+        if added:
+            self._log([{"op": "add", "student": student.to_dict()}])
+        return added
+
+    def _add_student(self, student):
         try:
             # Check if student already exists (by user_id)
             if student.user_id in self._user_id_dict:
                 # Update existing student
-                self.remove_student_by_id(student.user_id)
+                self._remove_student(student.user_id)
 
-            # Add to sorted lists for O(log n) search
-            bisect.insort(self._by_user_id, (student.user_id, student))
+            # Add to sorted indexes for O(log n) search
+            self._by_user_id.add(student.user_id, student)
 
             # Normalize name for consistent searching
-            normalized_name = self._normalize_name(student.name)
-            bisect.insort(self._by_name, (normalized_name, student))
+            if student.name_key is None:
+                student.name_key = normalize_name(student.name)
+            normalized_name = student.name_key
+            self._by_name.add((normalized_name, student.user_id), student)
 
             # Add to dictionaries for O(1) search
             self._user_id_dict[student.user_id] = student
+            if normalized_name not in self._name_dict:
+                self._index_new_name(normalized_name)
             self._name_dict[normalized_name].append(student)
+            self._db_id_dict[student.db_id] = student
 
             return True
 
@@ -56,25 +98,111 @@ class StudentDatabase:
             traceback.print_exc()
             return False
 
+    def _index_new_name(self, normalized_name):
+        """Add a name that no student had before to the name search indexes that are built"""
+        if self._name_trigrams is not None:
+            self._name_trigrams.add(normalized_name)
+        if self._name_bktree is not None:
+            self._name_bktree.add(normalized_name)
+
+    def add_students(self, students):
+        """Add many students at once, building all data structures in one pass
+
+        When the batch is at least as large as the database, the sorted indexes are
+        rebuilt with a single sort instead of inserting every student. Students that
+        already exist (by user_id) are replaced. Returns the number of students added.
+        """
+        new_students = self._add_students(students)
+        self._log({"op": "add", "student": student.to_dict()} for student in new_students.values())
+        return len(new_students)
+
+    def _add_students(self, students):
+        """Add many students without journaling them, returns the added students by user_id
+
+        Errors raised while iterating over students (e.g. by a file being decoded) are
+        passed on to the caller.
+        """
+        with gc_paused():
+            return self._add_students_batch(students)
+
+    def _add_students_batch(self, students):
+        # Later records win over earlier ones with the same user_id
+        new_students = {}
+        for student in students:
+            new_students[student.user_id] = student
+
+        try:
+            # Drop the students that are being replaced
+            if self._user_id_dict:
+                for user_id in new_students:
+                    if user_id in self._user_id_dict:
+                        self._remove_student(user_id)
+
+            # Normalize the names that have no key yet and fill the dictionaries
+            self._fill_name_keys(new_students.values())
+            name_dict = self._name_dict
+            db_id_dict = self._db_id_dict
+            index_names = self._name_trigrams is not None or self._name_bktree is not None
+            for student in new_students.values():
+                normalized_name = student.name_key
+                if index_names and normalized_name not in name_dict:
+                    self._index_new_name(normalized_name)
+                name_dict[normalized_name].append(student)
+                db_id_dict[student.db_id] = student
+            self._user_id_dict.update(new_students)
+
+            if len(new_students) >= len(self._by_user_id):
+                # Rebuild the sorted indexes with one sort each. The name entries are
+                # taken in user_id order and stably sorted by name alone, which leaves
+                # them in (name, user_id) order without comparing tuples.
+                self._by_user_id.build(list(self._by_user_id) + list(new_students.items()))
+                name_entries = [((student.name_key, user_id), student) for user_id, student in self._by_user_id]
+                name_entries.sort(key=lambda entry: entry[0][0])
+                self._by_name.build(name_entries)
+            else:
+                for user_id, student in new_students.items():
+                    self._by_user_id.add(user_id, student)
+                    self._by_name.add((student.name_key, user_id), student)
+
+            return new_students
+
+        except Exception as e:
+            print(f"ERROR: Failed to add students: {e}")
+            import traceback
+            traceback.print_exc()
+            return {}
+
     def remove_student_by_id(self, user_id):
         """Remove a student by user_id from all data structures"""
+        removed = self._remove_student(user_id)
+        if removed:
+            self._log([{"op": "remove", "user_id": user_id}])
+        return removed
+
+    def _remove_student(self, user_id):
         if user_id not in self._user_id_dict:
             print(f"WARNING: Student {user_id} not found in database")
             return False
 
         try:
             student = self._user_id_dict[user_id]
-            normalized_name = self._normalize_name(student.name)
+            normalized_name = student.name_key
 
-            # Remove from sorted lists
-            self._by_user_id.remove((user_id, student))
-            self._by_name.remove((normalized_name, student))
+            # Remove from sorted indexes
+            self._by_user_id.remove(user_id)
+            self._by_name.remove((normalized_name, user_id))
 
             # Remove from dictionaries
             del self._user_id_dict[user_id]
             self._name_dict[normalized_name].remove(student)
             if not self._name_dict[normalized_name]:  # Remove empty list
                 del self._name_dict[normalized_name]
+                if self._name_trigrams is not None:
+                    self._name_trigrams.remove(normalized_name)
+                if self._name_bktree is not None:
+                    self._name_bktree.remove(normalized_name)
+            if self._db_id_dict.get(student.db_id) is student:
+                del self._db_id_dict[student.db_id]
 
             return True
         except Exception as e:
@@ -105,19 +233,68 @@ class StudentDatabase:
         # Not found in any format
         return None
 
+    def find_by_db_id(self, db_id):
+        """Find student by eClass DB-ID in O(1) average time using dictionary"""
+        return self._db_id_dict.get(db_id)
+
     def find_by_name(self, name):
         """Find students by name in O(1) average time using dictionary"""
         normalized_name = self._normalize_name(name)
         return self._name_dict.get(normalized_name, [])
 
     def search_partial_name(self, partial_name):
-        """Search for students whose names contain the partial name"""
+        """Search for students whose names contain the partial name, using the trigram index"""
         normalized_partial = self._normalize_name(partial_name)
         results = []
 
-        for normalized_name, students in self._name_dict.items():
-            if normalized_partial in normalized_name:
-                results.extend(students)
+        # Built on first use so loading stays fast, then kept up to date by add/remove
+        if self._name_trigrams is None:
+            self._name_trigrams = TrigramIndex(self._name_dict)
+
+        for normalized_name in self._name_trigrams.search(normalized_partial):
+            results.extend(self._name_dict[normalized_name])
+
+        return results
+
+    def search_prefix(self, prefix, limit=None):
+        """Yield the students whose names start with prefix, in name order
+
+        Uses a range lookup on the sorted name index, so only the entries inside the
+        prefix range are visited; an empty prefix walks the whole index. Stops after
+        limit students if a limit is given, a limit of 0 or less yields none.
+        """
+        if limit is not None and limit <= 0:
+            return
+        normalized_prefix = self._normalize_name(prefix)
+
+        # Every name starting with the prefix sorts between the prefix itself and the
+        # prefix followed by the largest possible character
+        low = (normalized_prefix,)
+        high = (normalized_prefix + "\U0010ffff",)
+
+        for count, (_, student) in enumerate(self._by_name.irange(low, high), 1):
+            yield student
+            if count == limit:
+                return
+
+    def find_fuzzy(self, name, max_distance=2, limit=10):
+        """Find the students whose names are closest to name, tolerating typos
+
+        Returns up to limit (distance, student) pairs with an edit distance of at most
+        max_distance from the normalized name, closest first.
+        """
+        normalized_name = self._normalize_name(name)
+
+        # Built on first use so loading stays fast, then kept up to date by add/remove
+        if self._name_bktree is None:
+            self._name_bktree = BKTree(self._name_dict)
+
+        results = []
+        for distance, match in self._name_bktree.search(normalized_name, max_distance):
+            for student in self._name_dict[match]:
+                results.append((distance, student))
+                if len(results) == limit:
+                    return results
 
         return results
 
@@ -136,59 +313,173 @@ class StudentDatabase:
     def clear(self):
         """Clear all data"""
         print(f"DEBUG: Clearing database (had {self.size()} students)")
-        self._by_user_id = []
-        self._by_name = []
+        self._by_user_id = SortedIndex()
+        self._by_name = SortedIndex()
         self._user_id_dict = {}
         self._name_dict = defaultdict(list)
+        self._db_id_dict = {}
+        self._name_trigrams = None
+        self._name_bktree = None
+        self._needs_snapshot = True
 
     def save_to_file(self):
-        """Save the database to a JSON file"""
+        """Save the database to its JSON file
+
+        In journal mode the changes are already in the journal, so saving only flushes
+        it to disk, unless the journal has grown enough to be compacted into the file.
+        """
+        if self.journal_mode and not self._needs_snapshot and not self._journal_due():
+            try:
+                self._journal.sync()
+                self._update_catalog(self.size(), None)
+                print(f"Database changes saved to {self._journal.path} ({self.size()} students)")
+                return True
+            except Exception as e:
+                print(f"Error saving database journal: {e}")
+                return False
+
+        return self._write_snapshot()
+
+    def _journal_due(self):
+        """Whether the journal is large enough to be compacted into the JSON file"""
         try:
-            # Convert all students to dictionaries
-            students_data = []
-            for student in self.get_all_students():
-                students_data.append(student.to_dict())
-
-            # Save to file
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'students': students_data,
-                    'total_count': len(students_data)
-                }, f, ensure_ascii=False, indent=2)
-
-            print(f"Database saved to {self.db_file} ({len(students_data)} students)")
+            snapshot_size = os.path.getsize(self.db_file)
+        except OSError:
+            return True
+        return self._journal.size() > min(self.compact_bytes, snapshot_size // 2)
+
+    def _write_snapshot(self):
+        """Rewrite the JSON file with all students and empty the journal
+
+        The file is written to a temporary file that then replaces it, so an interrupted
+        save leaves the previous file intact. Every record is encoded separately so its
+        byte range is known for the sidecar lookup index. The output of a .json file is
+        the same as json.dump with indent=2, a .ndjson file gets one student per line.
+        """
+        temp_file = self.db_file + ".tmp"
+        try:
+            records = []  # (user_id, normalized name, offset, length, crc32) of every student
+
+            digest = hashlib.sha256()  # Content hash for the catalog
+
+            with open(temp_file, 'wb') as f:
+                def write(data):
+                    f.write(data)
+                    digest.update(data)
+
+                def write_record(student, record):
+                    records.append((student.user_id, student.name_key, f.tell(),
+                                    len(record), zlib.crc32(record)))
+                    write(record)
+
+                students = self.get_all_students()
+                if self._is_ndjson():
+                    for student in students:
+                        write_record(student, (_ndjson_encoder.encode(student.to_dict()) + "\n").encode('utf-8'))
+                elif not students:
+                    write(b'{\n  "students": [],\n  "total_count": 0\n}')
+                else:
+                    write(b'{\n  "students": [\n')
+                    for i, student in enumerate(students):
+                        if i:
+                            write(b',\n')
+                        write_record(student, _encode_record(student.to_dict()).encode('utf-8'))
+                    write(f'\n  ],\n  "total_count": {len(students)}\n}}'.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temp_file, self.db_file)
+            self._journal.clear()  # Replaying it again would be harmless if this is interrupted
+            self._needs_snapshot = False
+
+            try:
+                write_sidecar(self.db_file, records)
+            except Exception as e:
+                # A stale index would be refused anyway, but don't leave it around
+                print(f"WARNING: Failed to write lookup index: {e}")
+                remove_sidecar(self.db_file)
+
+            self._update_catalog(len(students), digest.hexdigest())
+
+            print(f"Database saved to {self.db_file} ({len(students)} students)")
             return True
         except Exception as e:
             print(f"Error saving database: {e}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
             return False
 
+    def _update_catalog(self, students, sha256):
+        """Record the saved file in the catalog of its directory, for course databases only
+
+        A sha256 of None keeps the hash of the catalog entry.
+        """
+        if os.path.basename(self.db_file).startswith("students_"):
+            update_catalog(self.db_file, course_code_of(self.db_file), students, sha256, self.course_name)
+
+    def _is_ndjson(self):
+        """Whether the database file has one JSON object per line instead of a JSON document"""
+        return self.db_file.endswith(".ndjson")
+
     def load_from_file(self):
-        """Load the database from a JSON file"""
-        if not os.path.exists(self.db_file):
+        """Load the database from a JSON file, then apply the changes in its journal
+
+        The file is decoded one record at a time while the students are added, so the
+        whole file never has to be in memory next to the loaded students.
+        """
+        has_journal = os.path.exists(self._journal.path)
+        if not os.path.exists(self.db_file) and not has_journal:
             print(f"No existing database found at {self.db_file}")
             return False
 
         try:
-            with open(self.db_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
             # Clear existing data only if there are data
             if self.size() > 0:
                 print(f"DEBUG: Clearing existing {self.size()} students before loading")
                 self.clear()
 
             # Load students
-            students_data = data.get('students', [])
-            for student_dict in students_data:
-                student = Student(**student_dict)
-                self.add_student(student)
-
-            print(f"Loaded {len(students_data)} students from {self.db_file}")
+            loaded = 0
+            if os.path.exists(self.db_file):
+                if self._is_ndjson():
+                    students_data = iter_ndjson(self.db_file)
+                else:
+                    students_data = iter_json_array(self.db_file, "students")
+                loaded = len(self._add_students(Student(**student_dict) for student_dict in students_data))
+            self._needs_snapshot = False
+
+            print(f"Loaded {loaded} students from {self.db_file}")
+            if has_journal:
+                changes = self._replay_journal()
+                print(f"Applied {changes} journaled changes from {self._journal.path}")
             return True
         except Exception as e:
             print(f"Error loading database: {e}")
             return False
 
+    def _replay_journal(self):
+        """Apply the operations of the journal to the loaded students, returns their number"""
+        # Only the last operation on every student matters
+        changes = {}  # user_id -> Student, or None if removed
+        count = 0
+        for op in self._journal.read():
+            if op.get("op") == "add":
+                student = Student(**op["student"])
+                changes[student.user_id] = student
+            elif op.get("op") == "remove":
+                changes[op["user_id"]] = None
+            count += 1
+
+        for user_id, student in changes.items():
+            if student is None and user_id in self._user_id_dict:
+                self._remove_student(user_id)
+        self._add_students(student for student in changes.values() if student is not None)
+        return count
+
+    def close(self):
+        """Close the journal, if changes were appended to it"""
+        self._journal.close()
+
     def get_database_info(self):
         """Get information about the current database"""
         if not os.path.exists(self.db_file):
@@ -205,3 +496,87 @@ class StudentDatabase:
 - Last modified: {os.path.getmtime(self.db_file)}"""
         except Exception as e:
             return f"Error getting database info: {e}"
+
+
+# Compact encoder for the lines of .ndjson databases, created once since json.dumps
+# with options builds a new encoder on every call
+_ndjson_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _encode_record(record):
+    """A student's dictionary as json.dump(..., indent=2) writes it inside the students list
+
+    Encodes the string values directly, which is much faster than json.dumps with an
+    indent since that always uses the pure Python encoder.
+    """
+    fields = []
+    for key, value in record.items():
+        if isinstance(value, str):
+            value = encode_basestring(value)
+        else:
+            value = json.dumps(value, ensure_ascii=False)
+        fields.append(f"      {encode_basestring(key)}: {value}")
+    return "    {\n" + ",\n".join(fields) + "\n    }"
+
+
+# On-disk formats of the course databases. When a course has files in several formats
+# (after a migration), the later one in this list is used.
+DATABASE_EXTENSIONS = (".json", ".ndjson", ".sqlite")
+
+
+def open_database(db_file, auto_load=True, journal=False):
+    """Open a student database with the storage backend matching its file extension
+
+    journal only applies to JSON databases, SQLite commits small changes by itself.
+    """
+    if db_file.endswith(".sqlite"):
+        from ecs.modules.SQLiteStudentDatabase import SQLiteStudentDatabase
+        return SQLiteStudentDatabase(db_file, auto_load=auto_load)
+    return StudentDatabase(db_file, auto_load=auto_load, journal=journal)
+
+
+def course_code_of(db_file):
+    """Course code of a students_{course} database file of any format"""
+    filename = os.path.splitext(os.path.basename(db_file))[0]
+    return filename.replace("students_", "", 1)
+
+
+def find_databases(data_dir):
+    """Database file of every course in data_dir, sorted by course code
+
+    A migrated course keeps its old JSON file, the database in the newer format is used.
+    """
+    databases = {}
+    for extension in DATABASE_EXTENSIONS:
+        for db_file in glob.glob(os.path.join(data_dir, f"students_*{extension}")):
+            databases[course_code_of(db_file)] = db_file
+    return [databases[code] for code in sorted(databases)]
+
+
+def database_path(data_dir, code):
+    """Database file of a course, in the newest format it was migrated to"""
+    for extension in reversed(DATABASE_EXTENSIONS):
+        db_file = os.path.join(data_dir, f"students_{code}{extension}")
+        if os.path.exists(db_file):
+            return db_file
+    return os.path.join(data_dir, f"students_{code}.json")
+
+
+def convert_database(source_file, target_file):
+    """Copy a student database into a new database in another format
+
+    The format of both files follows from their extension, and the source is left
+    untouched. Returns the new database, or None if the source could not be loaded.
+    """
+    source = open_database(source_file, auto_load=False)
+    if not source.load_from_file():
+        return None
+
+    if os.path.exists(target_file):
+        os.remove(target_file)
+
+    target = open_database(target_file, auto_load=False)
+    target.add_students(source.get_all_students())
+    target.save_to_file()
+    source.close()
+    return target
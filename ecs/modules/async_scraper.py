@@ -0,0 +1,354 @@
+import aiohttp
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from ecs.modules.metrics import ScrapeMetrics
+from ecs.modules.scraper import ClassScraper
+from ecs.modules.utils import retry_delay, RETRY_STATUSES
+
+
+class AsyncClassScraper(ClassScraper):
+    """asyncio counterpart of ClassScraper
+
+    Runs many profile requests at once on a single thread, multiplexed over a small
+    pool of keep-alive connections. Course selection, parsing, the database and the
+    output files are shared with ClassScraper, so both engines produce the same results.
+    """
+    def __init__(self, user_instance, workers=100, rate_limit=5.0, page_size=500, cache=None, parser="auto", connections=8, journal=False, **kwargs):
+        super().__init__(user_instance, workers=workers, rate_limit=rate_limit, page_size=page_size, cache=cache, parser=parser, journal=journal, **kwargs)
+        self.connections = max(1, connections)  # Keep-alive connections shared by all requests
+        self.http = None  # aiohttp.ClientSession, only open while scraping
+
+    def scrape_users(self):
+        """Main method to scrape user information"""
+        self.metrics = ScrapeMetrics()
+        self._stats = None
+        try:
+            succeeded = asyncio.run(self._scrape_users())
+        except KeyboardInterrupt:
+            print()
+            logging.warning("Scraping cancelled by user, database was not saved")
+            succeeded = False
+        finally:
+            # Also after Ctrl-C, the pages fetched so far are only kept if the index lists them
+            if self.cache:
+                self.cache.save()
+        self.metrics.finish(succeeded, self._stats)
+        return succeeded
+
+    async def _scrape_users(self):
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        async with aiohttp.ClientSession(connector=connector) as http:
+            self.http = http
+
+            with self.metrics.timer("login"):
+                logged_in = await self.login()
+            if not logged_in:
+                return False
+
+            with self.metrics.timer("course list"):
+                courses = await self.get_course_codes()
+            if not courses:
+                logging.error("No courses found")
+                return False
+
+            if not self._select_course(courses):
+                return False
+            self.metrics.course_code = self.course_code
+
+            self._prepare_database()
+
+            # Get users for selected course, profiles are fetched while later pages are still loading
+            users = self.get_user_list(self.course_code)
+            try:
+                first_user = await users.__anext__()
+            except StopAsyncIteration:
+                logging.warning("No users found for this course.")
+                return False
+
+            logging.info(f"Retrieving {self.user_count} users")
+
+            # Results are stored in list order as soon as they arrive
+            self._begin_store(self.user_count)
+            try:
+                async for user, user_data, error in self._fetch_profiles(first_user, users):
+                    self._store_user(user, user_data, error)
+            except asyncio.CancelledError:
+                self._output.close()
+                raise
+
+        self.http = None
+        self._finish_store()
+        return True
+
+    async def _get(self, url, limit_rate=True, **kwargs):
+        """GET request returning (status, text), rate limited and retried like ClassScraper._get"""
+        status, _, text = await self._fetch(url, limit_rate, **kwargs)
+        return status, text
+
+    async def _fetch(self, url, limit_rate=True, **kwargs):
+        """GET request returning (status, headers, text)
+
+        Profile requests are rate limited (limit_rate). Throttled requests (429), server
+        errors and failed connections are retried up to self.max_retries times, after
+        the delay the server asked for in Retry-After or an exponential backoff.
+        """
+        attempt = 0
+        while True:
+            if limit_rate:
+                delay = self.rate_limiter.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            started = time.perf_counter()
+            try:
+                async with self.http.get(url, **kwargs) as response:
+                    body = await response.read()
+                    final = response.status not in RETRY_STATUSES or attempt >= self.max_retries
+                    self.metrics.record_request(time.perf_counter() - started, len(body), profile=limit_rate, final=final)
+                    if final:
+                        return response.status, response.headers, await response.text()
+                    delay = retry_delay(attempt, response.headers.get("Retry-After"))
+            except aiohttp.ClientConnectionError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = retry_delay(attempt)
+
+            attempt += 1
+            self.metrics.count_retry()
+            await asyncio.sleep(delay)
+
+    async def login(self):
+        """Authenticate with the eClass system"""
+        logging.info("Logging in to eClass")
+
+        # First, get a valid session by visiting the base URL
+        try:
+            async with self.http.get(self.base_url) as response:
+                await response.read()
+        except Exception as e:
+            logging.error(f"Error accessing base URL: {e}")
+
+        payload = {
+            "username": self.user.get_username(),
+            "password": self.user.get_password(),
+            "execution": self.user.get_execution(),
+            "_eventId": self.user.get_eventId(),
+            "submit": "Login"
+        }
+
+        try:
+            async with self.http.post(self.login_url, data=payload) as response:
+                logging.info(f"Login redirected to: {response.url}")
+                text = await response.text()
+
+            if "Αποσύνδεση" in text or "Έξοδος" in text or "Logout" in text:
+                logging.info("Login successful")
+                return True
+
+            # Try accessing the courses page, if we can access it, login was successful
+            status, courses_text = await self._get(self.courses_url, limit_rate=False)
+            if self._verify_login(status, courses_text):
+                return True
+
+            logging.error("Login failed. Please check your credentials.")
+            return False
+
+        except Exception as e:
+            logging.error(f"Error during login: {e}")
+            return False
+
+    async def get_course_codes(self):
+        """Get the list of course codes and names from the user's courses page"""
+        try:
+            status, text = await self._get(self.courses_url, limit_rate=False)
+        except aiohttp.ClientError as e:
+            logging.error(f"Error fetching course list: {e}")
+            return []
+
+        if status != 200:
+            logging.error(f"Failed to fetch course codes. Status code: {status}")
+            return []
+
+        courses = self._parse_course_list(text)
+        logging.info(f"Found {len(courses)} course codes")
+        return courses
+
+    async def get_user_list(self, course_code):
+        """Yield the users of a specific course, page by page, from the JSON endpoint
+
+        The next page is requested in the background while the users of the current
+        page are being processed. self.user_count holds the total number of users as
+        soon as the first page has arrived.
+        """
+        # First visit the course page to establish context
+        course_url = f"{self.base_url}/courses/{course_code}/"
+        self.user_count = 0
+        self.user_list_complete = False
+
+        try:
+            status, _ = await self._get(course_url, limit_rate=False)
+            if status != 200:
+                logging.warning(f"Could not access course page for {course_code}: {status}")
+        except Exception as e:
+            logging.warning(f"Error accessing course page: {e}")
+
+        try:
+            page = await self._get_user_page(course_code, course_url, 0)
+        except ValueError:
+            # Fall back to the HTML participants page
+            logging.info("Trying alternative method to get users...")
+            try:
+                status, text = await self._get(self._participants_url(course_code), limit_rate=False)
+                users = self._parse_participants(text) if status == 200 else []
+                logging.info(f"Found {len(users)} users using alternative method")
+            except Exception as e:
+                logging.error(f"Alternative method failed too: {e}")
+                users = []
+            self.user_count = len(users)
+            self.user_list_complete = bool(users)
+            for user in users:
+                yield user
+            return
+        except aiohttp.ClientError as e:
+            logging.error(f"Error fetching user list for course {course_code}: {e}")
+            return
+
+        if page is None:
+            return
+
+        self.user_count = self._total_records(page)
+        start = 0
+
+        while True:
+            rows = page.get("aaData", [])
+            start += len(rows)
+
+            # Request the next page before handing out the users of this one
+            next_page = None
+            if rows and start < self.user_count:
+                next_page = asyncio.create_task(self._get_user_page(course_code, course_url, start))
+
+            try:
+                for user in rows:
+                    yield user
+            except BaseException:
+                # The consumer stopped early, the prefetched page is no longer needed
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+
+            if next_page is None:
+                self.user_list_complete = True
+                return
+
+            try:
+                page = await next_page
+            except (ValueError, aiohttp.ClientError) as e:
+                page = None
+                logging.error(f"Error fetching user list page at {start}: {e}")
+
+            if page is None:
+                logging.error(f"User list is incomplete, only {start} of {self.user_count} users were retrieved")
+                return
+
+    async def _get_user_page(self, course_code, course_url, start):
+        """Fetch one page of the user list
+
+        Returns the decoded DataTables response, or None if the request failed.
+        Raises ValueError if the endpoint did not answer with JSON.
+        """
+        with self.metrics.timer("user list"):
+            status, text = await self._get(self._user_list_url(course_code, start), limit_rate=False,
+                                           headers=self._user_list_headers(course_url))
+        if status != 200:
+            logging.error(f"User list request failed with status {status}")
+            return None
+
+        try:
+            return json.loads(text)
+        except ValueError:
+            logging.error("Failed to parse JSON response from users list endpoint")
+            raise
+
+    async def parse_user(self, user):
+        """Extract user information from user data"""
+        try:
+            name, position, db_id, link = self._parse_user_row(user)
+
+            # Fetch user profile page
+            html = await self._get_profile_page(link)
+            return self._parse_profile(html, name, position, db_id)
+        except Exception as e:
+            logging.warning(f"Error parsing user: {e}")
+            raise
+
+    async def _get_profile_page(self, url):
+        """Fetch a profile page, going through the response cache if there is one"""
+        if not self.cache:
+            _, html = await self._get(url)
+            return html
+
+        html = self.cache.get(url)
+        if html is not None:
+            return html
+
+        status, headers, html = await self._fetch(url, headers=self.cache.validators(url))
+        if status == 304:
+            html = self.cache.revalidate(url)
+            if html is not None:
+                return html
+        else:
+            self.cache.count_miss()
+            if status == 200:
+                self.cache.put(url, html, headers.get("ETag"), headers.get("Last-Modified"))
+            return html
+
+        # The cached copy disappeared after the server confirmed it, fetch the page again
+        self.cache.count_miss()
+        _, html = await self._get(url)
+        return html
+
+    async def _safe_parse_user(self, user, semaphore):
+        """Parse a user under the concurrency limit, returning the error instead of raising it"""
+        student = self._unchanged_student(user)
+        if student:
+            return student, None
+
+        async with semaphore:
+            try:
+                return await self.parse_user(user), None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return None, e
+
+    async def _fetch_profiles(self, first_user, users):
+        """Fetch and parse user profiles with at most self.workers requests in flight
+
+        Yields (user, user_data, error) tuples in user list order, starting with
+        first_user and continuing with the async iterator users. Pending requests
+        are cancelled if the scrape is interrupted.
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+        pending = deque()
+
+        async def user_list():
+            yield first_user
+            async for user in users:
+                yield user
+
+        try:
+            async for user in user_list():
+                pending.append((user, asyncio.create_task(self._safe_parse_user(user, semaphore))))
+                if len(pending) >= self.workers * 2:
+                    user, task = pending.popleft()
+                    yield (user, *await task)
+
+            while pending:
+                user, task = pending.popleft()
+                yield (user, *await task)
+        finally:
+            for _, task in pending:
+                task.cancel()
@@ -0,0 +1,130 @@
+def levenshtein(a, b):
+    """Edit distance between two strings
+
+    Uses Myers' bit-parallel algorithm: each column of the dynamic programming
+    matrix is encoded in the bits of Python integers, so the distance takes
+    len(a) steps of a few integer operations instead of len(a) * len(b) steps.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    # Bit mask of the positions of every character of the shorter string
+    peq = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    pv = full  # Vertical +1 deltas
+    mv = 0  # Vertical -1 deltas
+    score = len(b)
+
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)  # Horizontal +1 deltas
+        mh = pv & xh  # Horizontal -1 deltas
+
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+
+    return score
+
+
+class BKTree:
+    """Burkhard-Keller tree of strings for nearest neighbour search by edit distance
+
+    Every child of a node is stored under its distance to that node, so by the
+    triangle inequality a search for words within distance d of a query only has
+    to descend into children whose edge label lies in [dist - d, dist + d].
+    Removed words are only marked and skipped; the tree is rebuilt once they make
+    up half of it.
+    """
+    def __init__(self, words=None):
+        self._root = None  # [word, {distance: child}]
+        self._words = set()
+        self._removed = set()
+        if words is not None:
+            for word in words:
+                self.add(word)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._words
+
+    def add(self, word):
+        """Insert a word"""
+        if word in self._words:
+            return
+        self._words.add(word)
+
+        # The word may still be in the tree from before it was removed
+        if word in self._removed:
+            self._removed.discard(word)
+            return
+
+        if self._root is None:
+            self._root = [word, {}]
+            return
+
+        node = self._root
+        while True:
+            distance = levenshtein(word, node[0])
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                return
+            node = child
+
+    def remove(self, word):
+        """Remove a word"""
+        if word not in self._words:
+            return
+        self._words.discard(word)
+        self._removed.add(word)
+
+        if len(self._removed) > len(self._words):
+            self._rebuild()
+
+    def _rebuild(self):
+        words = self._words
+        self._root = None
+        self._words = set()
+        self._removed = set()
+        for word in words:
+            self.add(word)
+
+    def search(self, word, max_distance=2, limit=None):
+        """Return up to limit (distance, word) pairs within max_distance, closest first"""
+        if self._root is None:
+            return []
+
+        results = []
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance and node_word not in self._removed:
+                results.append((distance, node_word))
+
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in children.items():
+                if low <= edge <= high:
+                    stack.append(child)
+
+        results.sort()
+        return results[:limit] if limit else results
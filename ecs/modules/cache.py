@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Persistent cache of fetched pages, keyed by URL
+
+    Pages are stored as files in cache_dir next to an index.json that keeps their
+    validators (ETag/Last-Modified), fetch time and size in least recently used order.
+    Entries younger than ttl seconds are served from disk, older ones are revalidated
+    with a conditional request. The least recently used pages are evicted once the
+    cache grows past max_bytes.
+    """
+    def __init__(self, cache_dir, ttl=86400, max_bytes=100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self._entries = OrderedDict()  # url -> entry, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # Statistics for the scrape summary
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0  # Pages downloaded again, whatever the server answered
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._load_index()
+
+    def _load_index(self):
+        """Load the index and delete page files that are not referenced by it"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+
+        for entry in entries:
+            if os.path.exists(self._path(entry["url"])):
+                self._entries[entry["url"]] = entry
+                self._size += entry["size"]
+
+        known = {os.path.basename(self._path(url)) for url in self._entries}
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".html") and filename not in known:
+                os.remove(os.path.join(self.cache_dir, filename))
+
+    def _path(self, url):
+        """File that holds the cached page of a URL"""
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".html")
+
+    def get(self, url):
+        """Return the cached page if it is still fresh, otherwise None"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry or time.time() - entry["stored_at"] > self.ttl:
+                return None
+            self._entries.move_to_end(url)
+
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                page = f.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return page
+
+    def validators(self, url):
+        """Conditional request headers for a stale cached page"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return {}
+
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def revalidate(self, url):
+        """Return the cached page after the server answered 304 Not Modified"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return None
+            entry["stored_at"] = time.time()
+            self._entries.move_to_end(url)
+
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                page = f.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            self.revalidated += 1
+        return page
+
+    def count_miss(self):
+        """Count a page that had to be downloaded"""
+        with self._lock:
+            self.misses += 1
+
+    def put(self, url, page, etag=None, last_modified=None):
+        """Store a freshly downloaded page"""
+        data = page.encode('utf-8')
+        path = self._path(url)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old:
+                self._size -= old["size"]
+
+            self._entries[url] = {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+                "size": len(data)
+            }
+            self._size += len(data)
+
+            # Evict least recently used pages
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                evicted_url, evicted = self._entries.popitem(last=False)
+                self._size -= evicted["size"]
+                try:
+                    os.remove(self._path(evicted_url))
+                except OSError:
+                    pass
+
+    def save(self):
+        """Write the index to disk
+
+        Must be called even when a scrape is interrupted: the next load deletes the
+        page files that the index does not reference.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(temp_file, self.index_file)
+
+    def stats(self):
+        """One line summary of cache usage"""
+        return (f"{self.hits} hits, {self.revalidated} revalidated, {self.misses} misses "
+                f"({len(self._entries)} pages, {self._size / (1024 * 1024):.1f} MB)")
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from ecs.modules.journal import journal_size
+
+
+# data/catalog.json describes every course database in the directory:
+#   {"courses": {course code: {file, name, students, size, mtime_ns, journal_size, sha256}}}
+# It is updated by every save, so listing the databases does not have to load them.
+# size, mtime_ns and sha256 describe the database file, journal_size its journal.
+
+
+def catalog_path(data_dir):
+    """Path of the catalog of a data directory"""
+    return os.path.join(data_dir, "catalog.json")
+
+
+def load_catalog(data_dir):
+    """Catalog entries of a data directory by course code, empty if there is no catalog"""
+    try:
+        with open(catalog_path(data_dir), 'r', encoding='utf-8') as f:
+            return json.load(f).get('courses', {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"WARNING: Ignoring unreadable catalog, run ecs --rebuild-catalog to repair it: {e}")
+        return {}
+
+
+def save_catalog(data_dir, courses):
+    """Write the catalog, replacing the old one atomically"""
+    path = catalog_path(data_dir)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'courses': courses}, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def file_hash(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def catalog_entry(db_file, students, sha256, course_name=None):
+    """Catalog entry of a database file that was just written"""
+    stat = os.stat(db_file)
+    return {
+        'file': os.path.basename(db_file),
+        'name': course_name,
+        'students': students,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'journal_size': journal_size(db_file),
+        'sha256': sha256
+    }
+
+
+def update_catalog(db_file, code, students, sha256, course_name=None):
+    """Record a saved database in the catalog of its directory
+
+    The course name and the hash are kept from the previous entry when they are not
+    given, which is the case when only the journal of the database changed.
+    """
+    data_dir = os.path.dirname(db_file) or "."
+    try:
+        courses = load_catalog(data_dir)
+        if course_name is None:
+            course_name = courses.get(code, {}).get('name')
+        if sha256 is None:
+            sha256 = courses.get(code, {}).get('sha256')
+        courses[code] = catalog_entry(db_file, students, sha256, course_name)
+        save_catalog(data_dir, courses)
+    except Exception as e:
+        print(f"WARNING: Failed to update catalog: {e}")
+
+
+def current_entry(courses, db_file, code):
+    """The catalog entry of a database if it still describes the file on disk, else None"""
+    entry = courses.get(code)
+    if not entry or entry.get('file') != os.path.basename(db_file):
+        return None
+    try:
+        stat = os.stat(db_file)
+    except OSError:
+        return None
+    if stat.st_size != entry.get('size') or stat.st_mtime_ns != entry.get('mtime_ns'):
+        return None
+    if journal_size(db_file) != entry.get('journal_size', 0):
+        return None
+    return entry
+
+
+def rebuild_catalog(data_dir):
+    """Recreate the catalog from the databases in a data directory, returns the entries
+
+    Every database is loaded to count its students. Course names are kept from the
+    old catalog, since they are not stored in the databases.
+    """
+    from ecs.modules.StudentDatabase import course_code_of, find_databases, open_database
+
+    old_courses = load_catalog(data_dir)
+    courses = {}
+    for db_file in find_databases(data_dir):
+        code = course_code_of(db_file)
+        db = open_database(db_file)
+        courses[code] = catalog_entry(db_file, db.size(), file_hash(db_file),
+                                      old_courses.get(code, {}).get('name'))
+    save_catalog(data_dir, courses)
+    return courses
@@ -3,13 +3,25 @@ import os
 import re
 import requests
 from dotenv import load_dotenv
+from urllib.parse import quote
+
+
+DEFAULT_BASE_URL = "https://eclass.aueb.gr"
+DEFAULT_SSO_URL = "https://sso.aueb.gr"
 
 
 class UserCredentials:
-    def __init__(self):
+    def __init__(self, base_url=None, sso_url=None):
         # Load credentials from environment variables or prompt user
         load_dotenv()
 
+        # eClass server, a different one (e.g. benchmarks/mock_eclass.py) can be set with ECLASS_BASE_URL.
+        # Its SSO login is expected on the same server unless ECLASS_SSO_URL says otherwise.
+        self.base_url = (base_url or os.getenv('ECLASS_BASE_URL') or DEFAULT_BASE_URL).rstrip("/")
+        default_sso_url = DEFAULT_SSO_URL if self.base_url == DEFAULT_BASE_URL else self.base_url
+        self.sso_url = (sso_url or os.getenv('ECLASS_SSO_URL') or default_sso_url).rstrip("/")
+        self.login_url = f"{self.sso_url}/login?service={quote(self.base_url + '/modules/auth/cas.php', safe='')}"
+
         self.username = os.getenv('ECLASS_USERNAME')
         self.password = os.getenv('ECLASS_PASSWORD')
 
@@ -37,7 +49,7 @@ class UserCredentials:
 
     def _get_execution_token(self):
         """Get the execution token from the login page dynamically"""
-        url = "https://eclass.aueb.gr/modules/auth/cas.php"
+        url = f"{self.base_url}/modules/auth/cas.php"
         try:
             response = requests.get(url)
             if response.status_code == 200:
@@ -54,7 +66,13 @@ class UserCredentials:
 
     def _build_json_endpoint(self, course_code="INF001"):
         """Build the JSON endpoint URL with the given course code"""
-        return f"https://eclass.aueb.gr/modules/user/userslist.php?course={course_code}&sEcho=1&iColumns=2&sColumns=%2C&iDisplayStart=0&iDisplayLength=10&mDataProp_0=0&sSearch_0=&bRegex_0=false&bSearchable_0=true&bSortable_0=true&mDataProp_1=1&sSearch_1=&bRegex_1=false&bSearchable_1=true&bSortable_1=true&sSearch=&bRegex=false&iSortCol_0=0&sSortDir_0=asc&iSortingCols=1&_=1678298218568"
+        return f"{self.base_url}/modules/user/userslist.php?course={course_code}&sEcho=1&iColumns=2&sColumns=%2C&iDisplayStart=0&iDisplayLength=10&mDataProp_0=0&sSearch_0=&bRegex_0=false&bSearchable_0=true&bSortable_0=true&mDataProp_1=1&sSearch_1=&bRegex_1=false&bSearchable_1=true&bSortable_1=true&sSearch=&bRegex=false&iSortCol_0=0&sSortDir_0=asc&iSortingCols=1&_=1678298218568"
+
+    def get_base_url(self):
+        return self.base_url
+
+    def get_login_url(self):
+        return self.login_url
 
     def get_username(self):
         return self.username
@@ -0,0 +1,128 @@
+import json
+import os
+from collections import defaultdict
+from ecs.modules.StudentDatabase import course_code_of, find_databases, open_database
+from ecs.modules.journal import journal_size
+
+
+class GlobalIndex:
+    """Merged index of the student IDs and names of every course database in a directory
+
+    Maps every user_id and normalized name to the database files that contain it,
+    so a student can be looked up in all courses at once. The per-course entries are
+    kept in global_index.json and only the databases whose file changed since the
+    last refresh are read again.
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.index_file = os.path.join(data_dir, "global_index.json")
+        self._courses = {}  # course code -> {file, size, mtime_ns, journal_size, students: [[user_id, normalized name]]}
+        self._by_user_id = defaultdict(list)  # user_id -> database files
+        self._by_name = defaultdict(list)  # normalized name -> database files
+
+        self._load()
+        if self.refresh():
+            self.save()
+        self._merge()
+
+    def _load(self):
+        """Read the stored per-course entries, starting empty if there are none"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self._courses = json.load(f).get('courses', {})
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable global index: {e}")
+            self._courses = {}
+
+    def refresh(self):
+        """Re-read the databases that changed since they were indexed, returns True if any did"""
+        changed = False
+        db_files = find_databases(self.data_dir)
+        current = {course_code_of(db_file): db_file for db_file in db_files}
+
+        # Courses whose database was deleted
+        for code in list(self._courses):
+            if code not in current:
+                del self._courses[code]
+                changed = True
+
+        for code, db_file in current.items():
+            stat = os.stat(db_file)
+            entry = self._courses.get(code)
+            if (entry and entry['file'] == os.path.basename(db_file)
+                    and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+                    and entry.get('journal_size', 0) == journal_size(db_file)):
+                continue
+
+            print(f"Indexing {code}...")
+            db = open_database(db_file)
+            self._courses[code] = {
+                'file': os.path.basename(db_file),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'journal_size': journal_size(db_file),
+                'students': [[student.user_id, student.name_key]
+                             for student in db.get_all_students()]
+            }
+            changed = True
+
+        return changed
+
+    def save(self):
+        """Write the per-course entries to global_index.json"""
+        temp_file = self.index_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'courses': self._courses}, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            print(f"WARNING: Failed to save global index: {e}")
+
+    def _merge(self):
+        """Build the user_id and name lookups of all courses"""
+        self._by_user_id = defaultdict(list)
+        self._by_name = defaultdict(list)
+        for code in sorted(self._courses):
+            entry = self._courses[code]
+            db_file = os.path.join(self.data_dir, entry['file'])
+            for user_id, normalized_name in entry['students']:
+                self._by_user_id[user_id].append(db_file)
+                files = self._by_name[normalized_name]
+                if not files or files[-1] != db_file:
+                    files.append(db_file)
+
+    def course_count(self):
+        """Number of indexed courses"""
+        return len(self._courses)
+
+    def find_by_user_id(self, user_id):
+        """Database files containing a student ID, accepting IDs with or without the 'p' prefix"""
+        if user_id.startswith('p'):
+            candidates = (user_id, user_id[1:])
+        else:
+            candidates = (user_id, 'p' + user_id)
+
+        files = []
+        for candidate in candidates:
+            for db_file in self._by_user_id.get(candidate, []):
+                if db_file not in files:
+                    files.append(db_file)
+        return files
+
+    def find_by_name(self, normalized_name):
+        """Database files containing students with exactly this normalized name"""
+        return list(self._by_name.get(normalized_name, []))
+
+    def search_partial_name(self, normalized_partial):
+        """Database files and the normalized names in them that contain normalized_partial
+
+        Returns (database file, [normalized names]) pairs in course order.
+        """
+        matches = defaultdict(list)
+        for normalized_name, files in self._by_name.items():
+            if normalized_partial in normalized_name:
+                for db_file in files:
+                    matches[db_file].append(normalized_name)
+        return sorted((db_file, sorted(names)) for db_file, names in matches.items())
@@ -0,0 +1,85 @@
+import json
+import os
+
+
+def journal_path(db_file):
+    """Path of the journal of a database file"""
+    return db_file + ".journal"
+
+
+def journal_size(db_file):
+    """Size in bytes of the journal of a database file, 0 if there is none"""
+    try:
+        return os.path.getsize(journal_path(db_file))
+    except OSError:
+        return 0
+
+
+class Journal:
+    """Append-only log of the changes made to a database since its last snapshot
+
+    Every change is one compact JSON object per line:
+        {"op":"add","student":{...}}  or  {"op":"remove","user_id":"..."}
+    Replaying an operation twice has the same effect as replaying it once, so a
+    journal that outlived a compaction of its snapshot is harmless.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def append(self, ops):
+        """Write operations at the end of the journal"""
+        if self._file is None:
+            # An interrupted write may have left an incomplete last line
+            needs_newline = False
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b'\n'
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if needs_newline:
+                self._file.write('\n')
+
+        self._file.writelines(json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n' for op in ops)
+        self._file.flush()
+
+    def sync(self):
+        """Make sure the appended operations reached the disk"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def size(self):
+        """Size of the journal in bytes"""
+        if self._file is not None:
+            self._file.flush()
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read(self):
+        """Yield the operations in the journal, skipping lines that were not fully written"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"WARNING: Skipping incomplete journal entry at {self.path}:{line_number}")
+
+    def clear(self):
+        """Delete the journal, once its operations are part of a snapshot"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,134 @@
+import json
+import re
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Characters that can continue a number, e.g. "12." decodes as 12 but may be "12.5e3"
+_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*")
+# End of an array item: the ',' or ']' after it and the whitespace around it
+_ITEM_END = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+
+class _Reader:
+    """Text buffer over a file that is refilled in chunks as it is consumed"""
+    def __init__(self, f, chunk_size):
+        self._file = f
+        self._chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read the next chunk, dropping the consumed part of the buffer; False at the end of the file"""
+        if self.eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, without consuming it ('' at the end of the file)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos} of the buffer")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value, reading more of the file until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value may continue in the next chunk
+                if self.fill():
+                    continue
+                raise
+            # A number could be cut at the end of the buffer, even where it already decodes
+            if (isinstance(value, (int, float)) and not isinstance(value, bool) and not self.eof
+                    and _NUMBER_TAIL.match(self.buffer, end).end() == len(self.buffer) and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Yield the items of the array whose '[' was just consumed, and consume its ']'
+
+        Items are decoded straight from the buffer, with the decoder's scanner, as long
+        as the ',' or ']' after them shows that they are complete. Only an item cut by
+        the end of the buffer goes through value() to read the next chunk.
+        """
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        scan = _decoder.scan_once
+        item_end = _ITEM_END.match
+        while True:
+            buffer = self.buffer
+            pos = self.pos
+            while True:
+                try:
+                    value, end = scan(buffer, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    break
+                separator = item_end(buffer, end)
+                if separator is None:
+                    break
+                pos = separator.end()
+                yield value
+                if separator.group(1) == "]":
+                    self.pos = pos
+                    return
+            self.pos = pos
+
+            yield self.value()
+            if self.peek() != ",":
+                self.expect("]")
+                return
+            self.pos += 1
+            self.peek()
+
+def iter_json_array(path, key="students", chunk_size=1024 * 1024):
+    """Yield the items of the array stored under key in a JSON file's top-level object
+
+    The file is read in chunks and every item is decoded on its own, so only one
+    chunk and one item are in memory at a time. Other top-level values are skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            name = reader.value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                reader.pos += 1
+                yield from reader.items()
+            else:
+                reader.value()
+
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            return
+
+
+def iter_ndjson(path):
+    """Yield the objects of a file with one JSON object per line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Phases of a scrape in report order. The user list, profile requests and parsing overlap
+# and are summed over the workers, so together they can take longer than the scrape.
+PHASES = ("login", "course list", "user list", "profile requests", "parse", "database insert", "database save")
+
+QUANTILES = (50, 95, 99)
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of sorted values, 0 if there are none"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class ScrapeMetrics:
+    """Where the time of a scrape goes: phase timers, profile request latencies, bytes and retries
+
+    Shared by the worker threads of a scrape, every method is thread-safe. Printed at
+    the end of the scraping summary and optionally written as JSON or as a Prometheus
+    textfile (for node_exporter's textfile collector).
+    """
+    def __init__(self):
+        self.course_code = None
+        self.succeeded = False
+        self.users = {}  # Counters of the scrape summary: processed, added, failed, ...
+        self.requests = 0  # HTTP responses received, including the ones that were retried
+        self.retries = 0
+        self.bytes = 0  # Size of the received response bodies
+        self._phases = dict.fromkeys(PHASES, 0.0)
+        self._latencies = []  # Seconds of the final response of every profile fetch
+        self._start = time.perf_counter()
+        self._end = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, phase):
+        """Add the time spent in the with block to a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    def record_request(self, seconds, size, profile=False, final=True):
+        """Count one HTTP response of size bytes that took seconds
+
+        Every profile response counts towards the time of the profile requests, but
+        only the final response of a fetch (final, not one that is retried) counts as
+        its latency, so fast error responses don't skew the percentiles.
+        """
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+            if profile:
+                self._phases["profile requests"] += seconds
+                if final:
+                    self._latencies.append(seconds)
+
+    def count_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def finish(self, succeeded, users=None):
+        """End the scrape, with the counters of its summary"""
+        self._end = time.perf_counter()
+        self.succeeded = succeeded
+        if users is not None:
+            self.users = dict(users)
+
+    def to_dict(self):
+        """All metrics as a JSON-serializable dictionary, times in seconds"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            phases = dict(self._phases)
+        end = self._end if self._end is not None else time.perf_counter()
+        return {
+            "course": self.course_code,
+            "succeeded": self.succeeded,
+            "duration_seconds": end - self._start,
+            "phases_seconds": phases,
+            "profile_requests": {
+                "count": len(latencies),
+                "sum_seconds": sum(latencies),
+                **{f"p{percent}_seconds": _percentile(latencies, percent) for percent in QUANTILES},
+                "max_seconds": latencies[-1] if latencies else 0.0
+            },
+            "requests": self.requests,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "users": self.users,
+            "timestamp": time.time()
+        }
+
+    def print_report(self):
+        """Print the metrics as part of the scraping summary"""
+        report = self.to_dict()
+        profiles = report["profile_requests"]
+        print("\n===== SCRAPING METRICS =====")
+        print(f"Total time: {report['duration_seconds']:.2f} s")
+        print("Time per phase (user list, profile requests and parse are summed over the workers):")
+        for phase, seconds in report["phases_seconds"].items():
+            print(f"  {phase + ':':<20} {seconds:>9.2f} s")
+        if profiles["count"]:
+            print(f"Profile fetches: {profiles['count']}, latency p50 {profiles['p50_seconds'] * 1000:.0f} ms, "
+                  f"p95 {profiles['p95_seconds'] * 1000:.0f} ms, p99 {profiles['p99_seconds'] * 1000:.0f} ms")
+        print(f"HTTP responses: {report['requests']}, retries: {report['retries']}, "
+              f"received: {report['bytes'] / 1024 / 1024:.2f} MB")
+
+    def write_json(self, path):
+        """Write the metrics to a JSON file"""
+        self._write(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + "\n")
+
+    def write_prometheus(self, path):
+        """Write the metrics in the Prometheus text format, for node_exporter's textfile collector"""
+        report = self.to_dict()
+        labels = f'course="{report["course"] or ""}"'
+        profiles = report["profile_requests"]
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP ecs_scrape_{name} {help_text}")
+            lines.append(f"# TYPE ecs_scrape_{name} {kind}")
+            for suffix, extra_labels, value in samples:
+                all_labels = ",".join(filter(None, [labels, extra_labels]))
+                lines.append(f"ecs_scrape_{name}{suffix}{{{all_labels}}} {value}")
+
+        metric("success", "gauge", "Whether the last scrape completed", [("", "", int(report["succeeded"]))])
+        metric("duration_seconds", "gauge", "Wall time of the last scrape", [("", "", report["duration_seconds"])])
+        metric("phase_seconds", "gauge", "Time spent in each phase of the last scrape, summed over the workers",
+               [("", f'phase="{phase}"', seconds) for phase, seconds in report["phases_seconds"].items()])
+        metric("profile_request_seconds", "summary", "Latency of the profile fetches of the last scrape, final responses only",
+               [("", f'quantile="{percent / 100}"', profiles[f"p{percent}_seconds"]) for percent in QUANTILES]
+               + [("_sum", "", profiles["sum_seconds"]), ("_count", "", profiles["count"])])
+        metric("requests", "gauge", "HTTP responses received by the last scrape, including retried ones", [("", "", report["requests"])])
+        metric("retries", "gauge", "Requests retried by the last scrape", [("", "", report["retries"])])
+        metric("received_bytes", "gauge", "Size of the response bodies received by the last scrape", [("", "", report["bytes"])])
+        metric("users", "gauge", "Users of the last scrape by result",
+               [("", f'result="{result}"', count) for result, count in report["users"].items()])
+        metric("last_run_timestamp_seconds", "gauge", "When the last scrape ended", [("", "", report["timestamp"])])
+
+        self._write(path, "\n".join(lines) + "\n")
+
+    def _write(self, path, text):
+        # Written through a temporary file, so a collector never reads a half-written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
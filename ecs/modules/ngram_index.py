@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+
+class TrigramIndex:
+    """Inverted index from character trigrams to the strings that contain them
+
+    A substring query is answered by intersecting the posting sets of the query's
+    trigrams, starting with the rarest, and checking only the remaining candidates.
+    Queries shorter than three characters fall back to a scan over all strings.
+    """
+    def __init__(self, keys=None):
+        self._postings = defaultdict(set)  # trigram -> strings containing it
+        self._keys = set()
+        if keys is not None:
+            for key in keys:
+                self.add(key)
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, key):
+        """Index a string"""
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        for trigram in self._trigrams(key):
+            self._postings[trigram].add(key)
+
+    def remove(self, key):
+        """Remove a string from the index"""
+        if key not in self._keys:
+            return
+        self._keys.discard(key)
+        for trigram in self._trigrams(key):
+            keys = self._postings[trigram]
+            keys.discard(key)
+            if not keys:
+                del self._postings[trigram]
+
+    def clear(self):
+        """Remove all strings"""
+        self._postings = defaultdict(set)
+        self._keys = set()
+
+    def search(self, substring):
+        """Return the indexed strings that contain substring, sorted"""
+        if len(substring) < 3:
+            return sorted(key for key in self._keys if substring in key)
+
+        postings = []
+        for trigram in self._trigrams(substring):
+            keys = self._postings.get(trigram)
+            if not keys:
+                return []
+            postings.append(keys)
+
+        # Intersect from the smallest posting set so the candidate set only shrinks
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates &= keys
+            if not candidates:
+                return []
+
+        # Trigrams can match in different places, verify the actual substring
+        return sorted(key for key in candidates if substring in key)
@@ -0,0 +1,195 @@
+import datetime
+import html as html_lib
+import importlib.util
+import re
+
+
+# Profile page parsers, from fastest to slowest
+#   regex:    precompiled regular expressions, no tree at all
+#   lxml:     lxml tree restricted to the profile panel (needs lxml installed)
+#   strainer: html.parser tree restricted to the profile panel
+#   full:     html.parser tree of the whole page
+#   auto:     the fastest available one, falling back to the full parse
+PARSERS = ("auto", "regex", "lxml", "strainer", "full")
+
+HAVE_LXML = importlib.util.find_spec("lxml") is not None
+
+# Only the student ID and the profile panel are needed from a profile page. Built
+# with the first tree parse, so that the CLI can import PARSERS without loading bs4.
+_profile_strainer = None
+
+_USER_ID_RE = re.compile(r'<div\b[^>]*\bclass=["\'][^"\']*\bnot_visible\b[^"\']*["\'][^>]*>(.*?)</div>', re.S)
+_PANEL_RE = re.compile(r'<div\b[^>]*\bclass=["\'][^"\']*\bprofile-content-panel-text\b[^"\']*["\'][^>]*>')
+# A row of the panel, matched right where the previous one ended, and the end of the panel
+_ROW_RE = re.compile(r'\s*<div\b[^>]*\bstyle=["\']line-height:26px;["\'][^>]*>(.*?)</div>', re.S)
+_PANEL_END_RE = re.compile(r'\s*</div>')
+_SPAN_RE = re.compile(r'<span\b[^>]*>(.*?)</span>', re.S)
+_LINK_RE = re.compile(r'<a\b[^>]*>(.*?)</a>', re.S)
+_TAG_RE = re.compile(r'<[^>]+>')
+_YEAR_RE = re.compile(r'(\d{4})')
+
+# Labels every profile panel has, a panel without one of them is left to the tree parsers
+_REQUIRED_LABELS = ("E-mail:", "Κατηγορία:", "Μέλος από:")
+
+
+def parse_profile(html, parser="auto"):
+    """Extract a student's details from their profile page
+
+    Returns a dictionary with user_id, email, phone, department, date and years.
+    Raises ValueError if the page has no profile data.
+    """
+    if parser == "auto":
+        fields = _parse_regex(html)
+        if fields is None:
+            fields = _parse_tree(html, "lxml" if HAVE_LXML else "html.parser", _strainer())
+        if fields is None:
+            fields = _parse_tree(html, "html.parser")
+    elif parser == "regex":
+        fields = _parse_regex(html)
+    elif parser == "lxml":
+        if not HAVE_LXML:
+            raise ValueError("The lxml parser requires lxml. Install it with: pip install lxml")
+        fields = _parse_tree(html, "lxml", _strainer())
+    elif parser == "strainer":
+        fields = _parse_tree(html, "html.parser", _strainer())
+    elif parser == "full":
+        fields = _parse_tree(html, "html.parser")
+    else:
+        raise ValueError(f"Unknown profile parser: {parser}")
+
+    if fields is None:
+        raise ValueError("Profile data not found")
+    return fields
+
+
+def _strainer():
+    """SoupStrainer keeping only the user ID and the profile panel of a page"""
+    global _profile_strainer
+    if _profile_strainer is None:
+        from bs4 import SoupStrainer
+        _profile_strainer = SoupStrainer("div", class_=["not_visible", "profile-content-panel-text"])
+    return _profile_strainer
+
+
+def _parse_tree(html, features, parse_only=None):
+    """Parse the profile with BeautifulSoup, returns None if the profile panel is missing"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, features, parse_only=parse_only)
+
+    # Extract User ID (student ID)
+    user_id_div = soup.find("div", class_="not_visible")
+    user_id = user_id_div.text if user_id_div else "N/A"
+
+    # Extract profile data
+    profile_div = soup.find("div", class_="profile-content-panel-text")
+    if not profile_div:
+        return None
+
+    # Each piece of information is in its own div with a span for the label
+    rows = []
+    for div in profile_div.find_all("div", style="line-height:26px;"):
+        span = div.find("span")
+        if not span:
+            continue
+
+        label = span.text.strip()
+        # Get the text content after the span (the value)
+        value = div.get_text().replace(span.get_text(), "", 1).strip()
+        email_link = div.find("a")
+        rows.append((label, value, email_link.text.strip() if email_link else None))
+
+    return _profile_fields(user_id, rows)
+
+
+def _parse_regex(html):
+    """Parse the profile with regular expressions, returns None if the page does not look as expected"""
+    panel = _PANEL_RE.search(html)
+    if not panel:
+        return None
+
+    user_id_match = _USER_ID_RE.search(html)
+    user_id = _text(user_id_match.group(1)) if user_id_match else "N/A"
+
+    rows = []
+    position = panel.end()
+    while True:
+        row = _ROW_RE.match(html, position)
+        if not row:
+            break
+        position = row.end()
+        content = row.group(1)
+        # Nested divs and scripts are beyond what the expressions understand
+        if "<div" in content or "<script" in content:
+            return None
+
+        span = _SPAN_RE.search(content)
+        if not span:
+            continue
+
+        span_text = _text(span.group(1))
+        value = _text(content).replace(span_text, "", 1).strip()
+        email_link = _LINK_RE.search(content)
+        rows.append((span_text.strip(), value, _text(email_link.group(1)).strip() if email_link else None))
+
+    # Anything but rows inside the panel is beyond what the expressions understand
+    if not _PANEL_END_RE.match(html, position):
+        return None
+
+    labels = [label for label, _, _ in rows]
+    if not all(any(required in label for label in labels) for required in _REQUIRED_LABELS):
+        return None
+
+    return _profile_fields(user_id, rows)
+
+
+def _text(fragment):
+    """Text content of an HTML fragment"""
+    return html_lib.unescape(_TAG_RE.sub("", fragment))
+
+
+def _profile_fields(user_id, rows):
+    """Build the profile dictionary from (label, value, link text) rows"""
+    # Initialize values
+    phone = ""
+    email = ""
+    department = "N/A"
+    date = "N/A"
+    years = "N/A"
+
+    for label, value, link_text in rows:
+        if "Τηλέφωνο:" in label:  # Phone
+            phone = value
+
+        elif "E-mail:" in label:  # Email
+            # Handle the email that might be in a script
+            if link_text is not None:
+                email = link_text
+            else:
+                email = value if value and value != "(e-mail address hidden)" else ""
+
+        elif "Κατηγορία:" in label:  # Department
+            department = value
+
+        elif "Μέλος από:" in label:  # Registration date
+            date = value
+            # Extract just the year (4 digits)
+            year_match = _YEAR_RE.search(value)
+            if year_match:
+                years = year_match.group(1)
+
+    # Calculate year
+    current_year = datetime.date.today().year
+    current_month = datetime.date.today().month
+    try:
+        years = str(current_year - int(years) + (1 if current_month >= 9 else 0))
+    except (ValueError, TypeError):
+        years = "N/A"
+
+    return {
+        "user_id": user_id,
+        "email": email,
+        "phone": phone,
+        "department": department,
+        "date": date,
+        "years": years
+    }
@@ -0,0 +1,187 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+from ecs.modules.StudentDatabase import course_code_of, find_databases, open_database
+from ecs.modules.journal import journal_size
+
+
+# Protocol of the query daemon: the client connects to data/ecs.sock and sends one
+# JSON object per line, the daemon answers every request with one JSON object per line.
+#   {"op": "ping"}                                  -> {"ok": true, "courses": [codes], "students": N}
+#   {"op": "lookup", "id": ID, "course": CODE}      -> {"ok": true, "matches": [{"course", "file", "student"}]}
+#   {"op": "name", "name": NAME, "course": CODE}    -> exact name matches, like lookup
+#   {"op": "partial", "name": NAME, "course": CODE} -> names containing NAME, like lookup
+#   {"op": "batch", "ids": [IDs], "course": CODE}   -> {"ok": true, "students": [student or null per ID]}
+# "course" is optional for lookup, name and partial, which then search every course.
+# Students are sent as Student.to_dict() dictionaries. Failed requests are answered
+# with {"ok": false, "error": message}.
+
+
+def socket_path(data_dir):
+    """Path of the query daemon's socket in a data directory"""
+    return os.path.join(data_dir, "ecs.sock")
+
+
+def query_daemon(data_dir, request, timeout=10.0):
+    """Send a request to the query daemon of a data directory
+
+    Returns the response, or None if no daemon is running or the request failed, in
+    which case the caller answers the query itself.
+    """
+    path = socket_path(data_dir)
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+            with sock.makefile("r", encoding="utf-8") as f:
+                response = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
+    if not response.get("ok"):
+        return None
+    return response
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the requests of one connection, one line each"""
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.query_server.handle(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class QueryServer:
+    """Daemon that keeps every course database of a data directory loaded
+
+    Answers student queries over a Unix-domain socket, so searches don't have to load
+    the databases. Before every query the database files are checked and the ones
+    that were changed, added or deleted since they were loaded are reloaded.
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.socket_file = socket_path(data_dir)
+        self._courses = {}  # course code -> (database file, (size, mtime_ns, journal size), database)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reload the databases whose files changed since they were loaded"""
+        with self._lock:
+            current = {course_code_of(db_file): db_file for db_file in find_databases(self.data_dir)}
+
+            for code in list(self._courses):
+                if code not in current:
+                    print(f"Unloading {code}")
+                    self._courses.pop(code)[2].close()
+
+            for code, db_file in current.items():
+                try:
+                    stat = os.stat(db_file)
+                except OSError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns, journal_size(db_file))
+                loaded = self._courses.get(code)
+                if loaded and loaded[0] == db_file and loaded[1] == signature:
+                    continue
+
+                print(f"Loading {code}...")
+                db = open_database(db_file)
+                if loaded:
+                    loaded[2].close()
+                self._courses[code] = (db_file, signature, db)
+
+    def _databases(self, course):
+        """(code, database file, database) of one course, or of all of them if course is None
+
+        Called with self._lock held, the databases may be closed once it is released.
+        """
+        if course is None:
+            codes = sorted(self._courses)
+        elif course in self._courses:
+            codes = [course]
+        else:
+            raise ValueError(f"No database for course {course}")
+        return [(code, self._courses[code][0], self._courses[code][2]) for code in codes]
+
+    def handle(self, request):
+        """Answer one request of the protocol"""
+        op = request.get("op")
+        if op == "ping":
+            with self._lock:
+                courses = sorted(self._courses)
+                students = sum(db.size() for _, _, db in self._courses.values())
+            return {"ok": True, "courses": courses, "students": students}
+
+        if op == "lookup":
+            search = lambda db: [db.find_by_user_id(request["id"])]
+        elif op == "name":
+            search = lambda db: db.find_by_name(request["name"])
+        elif op == "partial":
+            search = lambda db: db.search_partial_name(request["name"])
+        elif op != "batch":
+            raise ValueError(f"Unknown operation: {op}")
+
+        self.refresh()
+
+        # Queried under the lock: a refresh of another connection would otherwise close
+        # a database that is still being read, and the lazily built indexes of the
+        # databases (the trigram index of partial searches) are not thread-safe
+        with self._lock:
+            databases = self._databases(request.get("course"))
+
+            if op == "batch":
+                if len(databases) != 1:
+                    raise ValueError("batch needs a course")
+                db = databases[0][2]
+                students = [db.find_by_user_id(user_id) for user_id in request["ids"]]
+                return {"ok": True, "students": [student.to_dict() if student else None for student in students]}
+
+            matches = [{"course": code, "file": os.path.basename(db_file), "student": student.to_dict()}
+                       for code, db_file, db in databases
+                       for student in search(db) if student]
+        return {"ok": True, "matches": matches}
+
+    def serve_forever(self):
+        """Load the databases and answer requests until interrupted"""
+        if not hasattr(socket, "AF_UNIX"):
+            print("The query daemon needs Unix-domain sockets, which this system does not support.")
+            return
+
+        if os.path.exists(self.socket_file):
+            if query_daemon(self.data_dir, {"op": "ping"}) is not None:
+                print(f"A query daemon is already running on {self.socket_file}")
+                return
+            # Left behind by a daemon that did not exit cleanly
+            os.remove(self.socket_file)
+
+        self.refresh()
+
+        # Student data is only for the user running the daemon
+        old_umask = os.umask(0o077)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(self.socket_file, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        server.daemon_threads = True
+        server.query_server = self
+        try:
+            students = sum(db.size() for _, _, db in self._courses.values())
+            print(f"Serving {len(self._courses)} course(s), {students} students, on {self.socket_file}")
+            print("Press Ctrl-C to stop.")
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping query daemon")
+        finally:
+            server.server_close()
+            os.remove(self.socket_file)
+            for _, _, db in self._courses.values():
+                db.close()
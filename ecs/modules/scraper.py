@@ -1,26 +1,50 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import itertools
 import logging
-import time
-import re
 import os
-from ecs.modules.utils import progress_bar
+import time
+from ecs.modules.metrics import ScrapeMetrics
+from ecs.modules.utils import progress_bar, retry_delay, RateLimiter, RETRY_STATUSES
+from ecs.modules.parsers import parse_profile
 from ecs.modules.Student import Student
-from ecs.modules.StudentDatabase import StudentDatabase
+from ecs.modules.StudentDatabase import StudentDatabase, database_path, open_database
 
 
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s - %(message)s')
 
+# Answers to the question asked when the selected course already has a database
+DATABASE_MODES = ("update", "incremental", "fresh")
+
 
 class ClassScraper:
-    def __init__(self, user_instance):
+    def __init__(self, user_instance, workers=1, rate_limit=5.0, page_size=500, cache=None, parser="auto", journal=False,
+                 course=None, mode=None, max_retries=3):
         self.user = user_instance
+        self.course = course  # Course code to scrape instead of asking, None shows the course menu
+        self.mode = mode  # One of DATABASE_MODES for an existing database instead of asking, or None
+        self.max_retries = max_retries  # Retries of a request that was throttled or failed on the server
+        self.metrics = ScrapeMetrics()  # Timers, latencies, bytes and retries of the scrape
+        self.journal = journal  # Save database changes to an append-only journal
+        self.parser = parser  # Profile page parser, one of parsers.PARSERS
+        self.cache = cache  # Optional ResponseCache for profile pages
+        self.page_size = page_size  # Users requested per page of the course's user list
+        self.user_count = 0  # Total users of the selected course, known after the first page
+        self.user_list_complete = False  # Whether every page of the user list was retrieved
+        self.incremental = False  # Only fetch profiles of new or changed users
+        self.workers = max(1, workers)  # Number of profiles fetched in parallel
+        self.rate_limiter = RateLimiter(rate_limit)  # Global ceiling on profile requests per second
         self.session = requests.Session()
-        self.login_url = "https://sso.aueb.gr/login?service=https%3A%2F%2Feclass.aueb.gr%2Fmodules%2Fauth%2Fcas.php"
-        self.base_url = "https://eclass.aueb.gr"
+
+        # The eClass server and its SSO login, as resolved by the credentials
+        self.base_url = self.user.get_base_url()
+        self.login_url = self.user.get_login_url()
         self.courses_url = f"{self.base_url}/main/my_courses.php"
         self.course_code = "INF001"  # Default course code
+        self.course_name = None  # Full name of the selected course
 
         # Create data directory if it doesn't exist
         self.data_dir = "data"
@@ -69,31 +93,7 @@ class ClassScraper:
 
             # Try accessing the courses page, if we can access it, login was successful
             courses_response = self.session.get(self.courses_url)
-            if courses_response.status_code == 200:
-                # Save a copy of the courses page for debugging if needed
-                # with open("courses_debug.html", "w", encoding="utf-8") as f:
-                #     f.write(courses_response.text)
-
-                # Look for indicators that we're logged in
-                if ("Αποσύνδεση" in courses_response.text or 
-                "Έξοδος" in courses_response.text or 
-                "Logout" in courses_response.text or
-                "Τα μαθήματά μου" in courses_response.text or 
-                "My Courses" in courses_response.text):
-                    logging.info("Login successful (verified via courses page)")
-                    return True
-                
-            # If we can get course codes, we must be logged in
-            soup = BeautifulSoup(courses_response.text, 'html.parser')
-            course_links = soup.find_all('a', href=lambda href: href and '/courses/' in href)
-            
-            if course_links:
-                logging.info(f"Login successful (found {len(course_links)} course links)")
-                return True
-                
-            # If we don't see login form, we're probably logged in
-            if "password" not in courses_response.text.lower() and "username" not in courses_response.text.lower():
-                logging.info("Login appears successful (no login form found)")
+            if self._verify_login(courses_response.status_code, courses_response.text):
                 return True
 
             logging.error("Login failed. Please check your credentials.")
@@ -103,10 +103,72 @@ class ClassScraper:
             logging.error(f"Error during login: {e}")
             return False
 
+    def _verify_login(self, status, html):
+        """Whether the courses page (status, html) fetched after the login shows that it succeeded"""
+        if status == 200:
+            # Look for indicators that we're logged in
+            if ("Αποσύνδεση" in html or
+                "Έξοδος" in html or
+                "Logout" in html or
+                "Τα μαθήματά μου" in html or
+                "My Courses" in html):
+                logging.info("Login successful (verified via courses page)")
+                return True
+
+        # If we can get course codes, we must be logged in
+        soup = BeautifulSoup(html, 'html.parser')
+        course_links = soup.find_all('a', href=lambda href: href and '/courses/' in href)
+
+        if course_links:
+            logging.info(f"Login successful (found {len(course_links)} course links)")
+            return True
+
+        # If we don't see login form, we're probably logged in
+        if "password" not in html.lower() and "username" not in html.lower():
+            logging.info("Login appears successful (no login form found)")
+            return True
+
+        return False
+
+    def _configure_session(self):
+        """Size the session's connection pool so that every worker can keep its own connection"""
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get(self, url, limit_rate=True, **kwargs):
+        """GET request through the shared logged-in session
+
+        Profile requests are rate limited (limit_rate). Throttled requests (429), server
+        errors and failed connections are retried up to self.max_retries times, after
+        the delay the server asked for in Retry-After or an exponential backoff.
+        """
+        attempt = 0
+        while True:
+            if limit_rate:
+                self.rate_limiter.wait()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = retry_delay(attempt)
+            else:
+                final = response.status_code not in RETRY_STATUSES or attempt >= self.max_retries
+                self.metrics.record_request(time.perf_counter() - started, len(response.content), profile=limit_rate, final=final)
+                if final:
+                    return response
+                delay = retry_delay(attempt, response.headers.get("Retry-After"))
+
+            attempt += 1
+            self.metrics.count_retry()
+            time.sleep(delay)
+
     def get_course_codes(self):
         """Get the list of course codes and names from the user's courses page"""
         try:
-            response = self.session.get(self.courses_url)
+            response = self._get(self.courses_url, limit_rate=False)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching course list: {e}")
@@ -114,125 +176,257 @@ class ClassScraper:
 
         # Ensure the request was successful
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            courses = []
-
-            for td in soup.find_all('td'):
-                strong_tag = td.find('strong')
-                if strong_tag and strong_tag.find('a'):
-                    link = strong_tag.find('a')
-                    href = link['href']
-
-                    if '/courses/' in href:
-                        course_code = href.split('/courses/')[1].strip('/')
-                        course_name = link.text.strip()
-                        courses.append({
-                            'code': course_code,
-                            'name': course_name
-                        })
-
+            courses = self._parse_course_list(response.text)
             logging.info(f"Found {len(courses)} course codes")
             return courses
         else:
             logging.error(f"Failed to fetch course codes. Status code: {response.status_code}")
             return []
 
+    def _parse_course_list(self, html):
+        """Extract course codes and names from the my_courses.php page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        courses = []
+
+        for td in soup.find_all('td'):
+            strong_tag = td.find('strong')
+            if strong_tag and strong_tag.find('a'):
+                link = strong_tag.find('a')
+                href = link['href']
+
+                if '/courses/' in href:
+                    course_code = href.split('/courses/')[1].strip('/')
+                    course_name = link.text.strip()
+                    courses.append({
+                        'code': course_code,
+                        'name': course_name
+                    })
+
+        return courses
+
     def get_user_list(self, course_code):
-        """Get the list of users for a specific course using the JSON endpoint"""
+        """Yield the users of a specific course, page by page, from the JSON endpoint
+
+        The next page is requested in the background while the users of the current
+        page are being processed. self.user_count holds the total number of users as
+        soon as the first page has arrived.
+        """
         # First visit the course page to establish context
         course_url = f"{self.base_url}/courses/{course_code}/"
+        self.user_count = 0
+        self.user_list_complete = False
 
         try:
             # Visit the course page first
-            course_resp = self.session.get(course_url)
+            course_resp = self._get(course_url, limit_rate=False)
             if course_resp.status_code != 200:
                 logging.warning(f"Could not access course page for {course_code}: {course_resp.status_code}")
         except Exception as e:
             logging.warning(f"Error accessing course page: {e}")
 
-        # Try to get the user list
-        json_url = f"{self.base_url}/modules/user/userslist.php?course={course_code}&sEcho=1&iColumns=2&sColumns=%2C&iDisplayStart=0&iDisplayLength=1000"
+        # Try to get the first page of the user list
+        try:
+            page = self._get_user_page(course_code, course_url, 0)
+        except ValueError:
+            # Attempt to find an alternative way to get user data
+            users = self._get_participants(course_code)
+            self.user_count = len(users)
+            self.user_list_complete = bool(users)
+            yield from users
+            return
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching user list for course {course_code}: {e}")
+            return
+
+        if page is None:
+            return
+
+        self.user_count = self._total_records(page)
+        start = 0
+
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            while True:
+                rows = page.get("aaData", [])
+                start += len(rows)
 
+                # Request the next page before handing out the users of this one
+                next_page = None
+                if rows and start < self.user_count:
+                    next_page = prefetcher.submit(self._get_user_page, course_code, course_url, start)
+
+                yield from rows
+
+                if next_page is None:
+                    self.user_list_complete = True
+                    return
+
+                try:
+                    page = next_page.result()
+                except (ValueError, requests.exceptions.RequestException) as e:
+                    page = None
+                    logging.error(f"Error fetching user list page at {start}: {e}")
+
+                if page is None:
+                    logging.error(f"User list is incomplete, only {start} of {self.user_count} users were retrieved")
+                    return
+
+    def _get_user_page(self, course_code, course_url, start):
+        """Fetch one page of the user list
+
+        Returns the decoded DataTables response, or None if the request failed.
+        Raises ValueError if the endpoint did not answer with JSON.
+        """
+        with self.metrics.timer("user list"):
+            response = self._get(self._user_list_url(course_code, start), limit_rate=False, headers=self._user_list_headers(course_url))
+
+        # Debug information
+        if response.status_code != 200:
+            logging.error(f"User list request failed with status {response.status_code}")
+            return None
+
+        # Check if response is JSON
         try:
-            headers = {
-                "X-Requested-With": "XMLHttpRequest",
-                "Accept": "application/json, text/javascript, */*; q=0.01",
-                "Referer": course_url
-            }
+            return response.json()
+        except ValueError:
+            # If not JSON, save response for debugging
+            with open("userslist_error.html", "w", encoding="utf-8") as f:
+                f.write(response.text)
+            logging.error("Failed to parse JSON response from users list endpoint")
+            raise
 
-            response = self.session.get(json_url, headers=headers)
+    def _get_participants(self, course_code):
+        """Get the users of a course from the HTML participants page"""
+        logging.info("Trying alternative method to get users...")
+        try:
+            part_resp = self.session.get(self._participants_url(course_code))
 
-            # Debug information
-            if response.status_code != 200:
-                logging.error(f"User list request failed with status {response.status_code}")
-                return []
+            if part_resp.status_code == 200:
+                users = self._parse_participants(part_resp.text)
+                logging.info(f"Found {len(users)} users using alternative method")
+                return users
+        except Exception as e:
+            logging.error(f"Alternative method failed too: {e}")
+
+        return []
+
+    def _total_records(self, page):
+        """Total number of users reported by a DataTables response"""
+        try:
+            return int(page.get("iTotalRecords", len(page.get("aaData", []))))
+        except (TypeError, ValueError):
+            return len(page.get("aaData", []))
+
+    def _user_list_url(self, course_code, start=0):
+        """Build the DataTables JSON endpoint URL for one page of a course's user list"""
+        return f"{self.base_url}/modules/user/userslist.php?course={course_code}&sEcho=1&iColumns=2&sColumns=%2C&iDisplayStart={start}&iDisplayLength={self.page_size}"
+
+    def _user_list_headers(self, course_url):
+        """Headers that make the user list request look like the DataTables AJAX call"""
+        return {
+            "X-Requested-With": "XMLHttpRequest",
+            "Accept": "application/json, text/javascript, */*; q=0.01",
+            "Referer": course_url
+        }
+
+    def _participants_url(self, course_code):
+        """URL of the HTML participants page used when the JSON endpoint fails"""
+        return f"{self.base_url}/modules/user/users.php?course={course_code}"
 
-            # Check if response is JSON
+    def _parse_participants(self, html):
+        """Extract users from the HTML participants page in the same shape as the JSON endpoint rows"""
+        soup = BeautifulSoup(html, 'html.parser')
+        users = []
+
+        user_rows = soup.select("table.table-default tr")
+        for row in user_rows[1:]:  # Skip header row
             try:
-                data = response.json()
-                return data.get("aaData", [])
-            except ValueError:
-                # If not JSON, save response for debugging
-                with open("userslist_error.html", "w", encoding="utf-8") as f:
-                    f.write(response.text)
-                logging.error("Failed to parse JSON response from users list endpoint")
+                cells = row.find_all('td')
+                if len(cells) >= 2:
+                    # First cell contains name
+                    user_link = cells[0].find('a')
+
+                    # Second cell contains position
+                    position = cells[1].text.strip() if len(cells) > 1 else "N/A"
+
+                    if user_link:
+                        user_name = user_link.text.strip()
+                        href = user_link.get('href', '')
+                        # Extract DB ID from href
+                        db_id = href.split('uid=')[-1] if 'uid=' in href else 'unknown'
+
+                        users.append({
+                            "0": f"<a href='{href}'>{user_name}</a>",
+                            "1": position,
+                            "DT_RowId": db_id
+                        })
+            except Exception as e:
+                logging.warning(f"Error parsing user row: {e}")
 
-                # Attempt to find an alternative way to get user data
-                logging.info("Trying alternative method to get users...")
-                try:
-                    # Try to get users from the participants page instead
-                    participants_url = f"{self.base_url}/modules/user/users.php?course={course_code}"
-                    part_resp = self.session.get(participants_url)
-
-                    if part_resp.status_code == 200:
-                        soup = BeautifulSoup(part_resp.text, 'html.parser')
-                        users = []
-
-                        user_rows = soup.select("table.table-default tr")
-                        for row in user_rows[1:]:  # Skip header row
-                            try:
-                                cells = row.find_all('td')
-                                if len(cells) >= 2:
-                                    # First cell contains name
-                                    user_link = cells[0].find('a')
-
-                                    # Second cell contains position
-                                    position = cells[1].text.strip() if len(cells) > 1 else "N/A"
-
-                                    if user_link:
-                                        user_name = user_link.text.strip()
-                                        href = user_link.get('href', '')
-                                        # Extract DB ID from href
-                                        db_id = href.split('uid=')[-1] if 'uid=' in href else 'unknown'
-
-                                        users.append({
-                                            "0": f"<a href='{href}'>{user_name}</a>",
-                                            "1": position,
-                                            "DT_RowId": db_id
-                                        })
-                            except Exception as e:
-                                logging.warning(f"Error parsing user row: {e}")
-
-                        logging.info(f"Found {len(users)} users using alternative method")
-                        return users
-                except Exception as e:
-                    logging.error(f"Alternative method failed too: {e}")
-
-                return []
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching user list for course {course_code}: {e}")
-            return []
+        return users
 
     def scrape_users(self):
         """Main method to scrape user information"""
-        if not self.login():
+        self.metrics = ScrapeMetrics()
+        self._stats = None
+        try:
+            succeeded = self._scrape_users()
+        finally:
+            # Also after Ctrl-C, the pages fetched so far are only kept if the index lists them
+            if self.cache:
+                self.cache.save()
+        self.metrics.finish(succeeded, self._stats)
+        return succeeded
+
+    def _scrape_users(self):
+        with self.metrics.timer("login"):
+            logged_in = self.login()
+        if not logged_in:
             return False
 
-        courses = self.get_course_codes()
+        self._configure_session()
+
+        with self.metrics.timer("course list"):
+            courses = self.get_course_codes()
         if not courses:
             logging.error("No courses found")
             return False
 
+        if not self._select_course(courses):
+            return False
+        self.metrics.course_code = self.course_code
+
+        self._prepare_database()
+
+        # Get users for selected course, profiles are fetched while later pages are still loading
+        users = self.get_user_list(self.course_code)
+        first_user = next(users, None)
+        if first_user is None:
+            logging.warning("No users found for this course.")
+            return False
+
+        logging.info(f"Retrieving {self.user_count} users")
+        user_list = itertools.chain([first_user], users)
+
+        # Profiles are fetched concurrently but come back in list order, so the
+        # database and the text file are filled deterministically
+        self._store_users(self.user_count, self._fetch_profiles(user_list))
+        return True
+
+    def _select_course(self, courses):
+        """Show the course menu and store the user's choice in self.course_code
+
+        If a course code was given (self.course), that course is selected without asking.
+        """
+        if self.course:
+            for course in courses:
+                if course['code'] == self.course:
+                    self.course_code = course['code']
+                    self.course_name = course['name']
+                    logging.info(f"Selected course: {self.course_code} ({self.course_name})")
+                    return True
+            logging.error(f"Course {self.course} is not one of your courses")
+            return False
+
         # Display course menu
         print("\nAvailable courses:")
         for i, course in enumerate(courses, 1):
@@ -251,6 +445,7 @@ class ClassScraper:
                 if 0 <= choice_index < len(courses):
                     selected_course = courses[choice_index]
                     self.course_code = selected_course['code']
+                    self.course_name = selected_course['name']
                     break
                 else:
                     print(f"Invalid selection. Please enter a number between 1 and {len(courses)}.")
@@ -258,128 +453,243 @@ class ClassScraper:
                 print("Please enter a valid number or 'q' to quit.")
 
         logging.info(f"Selected course: {self.course_code} ({courses[choice_index]['name']})")
+        return True
 
+    def _prepare_database(self):
+        """Open the selected course's database, asking whether to update or replace existing data"""
         # Update output file name with selected course code
         self.output_file = os.path.join(self.data_dir, f"user-ids-{self.course_code}.txt")
-        db_file = os.path.join(self.data_dir, f"students_{self.course_code}.json")
+        db_file = database_path(self.data_dir, self.course_code)
 
         # Check if database file exists and ask user preference
         if os.path.exists(db_file):
             # Load existing database to check size
-            temp_db = StudentDatabase(db_file)
+            temp_db = open_database(db_file, journal=self.journal)
             if temp_db.size() > 0:
                 print(f"\nFound existing database with {temp_db.size()} students.")
-                update_choice = input("Do you want to (u)pdate existing data or start (f)resh? [u/f]: ").lower()
+                if self.mode:
+                    update_choice = self.mode[0]
+                else:
+                    update_choice = input("Do you want to (u)pdate existing data, (i)ncrementally update only new or changed users, or start (f)resh? [u/i/f]: ").lower()
                 if update_choice == 'f':
                     print("Starting with fresh database...")
                     # Create new empty database
-                    self.student_db = StudentDatabase(db_file, auto_load=False)
+                    self.student_db = open_database(db_file, auto_load=False, journal=self.journal)
+                elif update_choice == 'i':
+                    print("Incrementally updating existing database...")
+                    self.student_db = temp_db
+                    self.incremental = True
                 else:
                     print("Updating existing database...")
                     self.student_db = temp_db
             else:
                 # Empty database file exists
-                self.student_db = StudentDatabase(db_file, auto_load=False)
+                self.student_db = open_database(db_file, auto_load=False, journal=self.journal)
         else:
             # No database file exists
             print("Creating new database...")
-            self.student_db = StudentDatabase(db_file, auto_load=False)
-
-        # Get users for selected course
-        user_list = self.get_user_list(self.course_code)
-        logging.info(f"Retrieved {len(user_list)} users")
+            self.student_db = open_database(db_file, auto_load=False, journal=self.journal)
+
+        # Saved in the catalog along with the database
+        self.student_db.course_name = self.course_name
+
+    def _store_users(self, total, results):
+        """Add scraped profiles to the database and the text file, then save and print a summary
+
+        Args:
+            total: Number of users of the selected course
+            results: Iterable of (user, user_data, error) tuples in user list order
+        """
+        self._begin_store(total)
+        for user, user_data, error in results:
+            self._store_user(user, user_data, error)
+        self._finish_store()
+
+    def _begin_store(self, total):
+        """Open the text output file and reset the scrape counters"""
+        print(f"Processing {total} users...")
+        self._stats = {"total": total, "processed": 0, "added": 0, "failed": 0, "unchanged": 0, "removed": 0}
+        self._seen_db_ids = set()
+        self._new_students = []
+        self._output = open(self.output_file, "w", encoding="utf-8")
+        progress_bar(0, total or 1)
+
+    def _store_user(self, user, user_data, error=None):
+        """Add one scraped profile to the database and the text file"""
+        stats = self._stats
+        stats["processed"] += 1
+        i = stats["processed"] - 1
+        total = max(stats["total"], stats["processed"])  # Users may join while the list is being paged
+        self._seen_db_ids.add(user.get("DT_RowId"))
+
+        # Incremental scrapes hand back the stored Student for users that did not change
+        if isinstance(user_data, Student):
+            stats["unchanged"] += 1
+            self._output.write("+" + "―" * 69 + "+\n")
+            self._output.write(self.format_user_info(user_data.to_dict()))
+            progress_bar(i + 1, total)
+            return
+
+        if error is not None:
+            stats["failed"] += 1
+            logging.warning(f"Error processing user {i+1}: {error}")
+            # Update progress bar even on error
+            progress_bar(i + 1, total)
+            return
 
-        if not user_list:
-            logging.warning("No users found for this course.")
-            return False
-
-        print(f"Processing {len(user_list)} users...")
-        students_added = 0
-        students_failed = 0
+        try:
+            # Create Student object and add to database
+            if user_data and user_data.get('name'):
+                student = Student(
+                    name=user_data.get('name', 'N/A'),
+                    user_id=user_data.get('user_id', 'N/A'),
+                    position=user_data.get('position', 'N/A'),
+                    email=user_data.get('email', 'N/A'),
+                    phone=user_data.get('phone', 'N/A'),
+                    department=user_data.get('department', 'N/A'),
+                    date=user_data.get('date', 'N/A'),
+                    years=user_data.get('years', 'N/A'),
+                    db_id=user_data.get('db_id', 'N/A')
+                )
+
+                # Collected and added to the database in one batch when the scrape ends
+                self._new_students.append(student)
+            else:
+                stats["failed"] += 1
+                logging.warning(f"User data for user {i+1} is incomplete or missing name: {user_data}")
 
-        with open(self.output_file, "w", encoding="utf-8") as f:
-            total = len(user_list) if user_list else 1
-            progress_bar(0, total)
+            # Write to file
+            if user_data:
+                self._output.write("+" + "―" * 69 + "+\n")
+                self._output.write(self.format_user_info(user_data))
 
-            for i, user in enumerate(user_list):
-                try:
-                    # Parse user data
-                    user_data = self.parse_user(user)
-
-                    # Create Student object and add to database
-                    if user_data and user_data.get('name'):
-                        student = Student(
-                            name=user_data.get('name', 'N/A'),
-                            user_id=user_data.get('user_id', 'N/A'),
-                            position=user_data.get('position', 'N/A'),
-                            email=user_data.get('email', 'N/A'),
-                            phone=user_data.get('phone', 'N/A'),
-                            department=user_data.get('department', 'N/A'),
-                            date=user_data.get('date', 'N/A'),
-                            years=user_data.get('years', 'N/A'),
-                            db_id=user_data.get('db_id', 'N/A')
-                        )
-
-                        # Add to database
-                        success = self.student_db.add_student(student)
-                        if success:
-                            students_added += 1
-                        else:
-                            students_failed += 1
-                            logging.warning(f"Failed to add student {user_data.get('name', 'Unknown')} to database")
-                            continue
-                    else:
-                        students_failed += 1
-                        logging.warning(f"User data for user {i+1} is incomplete or missing name: {user_data}")
-
-                    # Write to file
-                    if user_data:
-                        f.write("+" + "―" * 69 + "+\n")
-                        f.write(self.format_user_info(user_data))
-
-                    # Update progress bar
-                    progress_bar(i + 1, total)
-
-                    # Add a small delay to avoid overloading the server
-                    time.sleep(0.2)
-                except Exception as e:
-                    students_failed += 1
-                    logging.warning(f"Error processing user {i+1}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    # Update progress bar even on error
-                    progress_bar(i + 1, total)
-                    continue
-
-            f.write("+" + "―" * 69 + "+\n")
-            print()  # Add a newline after progress bar completes
-
-            # Print summary
-            print(f"\n===== SCRAPING SUMMARY =====")
-            print(f"Total users processed: {len(user_list)}")
-            print(f"Students added to database: {students_added}")
-            print(f"Failed/skipped: {students_failed}")
-            print(f"Database size: {self.student_db.size()}")
-            print(f"Files saved in: {os.path.abspath(self.data_dir)}/")
-            print(f"  - JSON database: {os.path.basename(db_file)}")
-            print(f"  - Text file: {os.path.basename(self.output_file)}")
-
-            logging.info(f"User data written to {self.output_file}")
-
-            print(f"Students processed: {students_added}")
-            print(f"Database size: {self.student_db.size()}")
-
-            # Save database to file
-            if self.student_db.size() > 0:
-                success = self.student_db.save_to_file()
-                if success:
-                    logging.info(f"Database saved with {self.student_db.size()} students")
+            # Update progress bar
+            progress_bar(i + 1, total)
+        except Exception as e:
+            stats["failed"] += 1
+            logging.warning(f"Error processing user {i+1}: {e}")
+            import traceback
+            traceback.print_exc()
+            # Update progress bar even on error
+            progress_bar(i + 1, total)
+
+    def _finish_store(self):
+        """Close the text output file, print the scrape summary and save the database"""
+        stats = self._stats
+        self._output.write("+" + "―" * 69 + "+\n")
+        self._output.close()
+        print()  # Add a newline after progress bar completes
+
+        # Add all scraped students to the database at once
+        with self.metrics.timer("database insert"):
+            if self._new_students:
+                added = self.student_db.add_students(self._new_students)
+                if added:
+                    stats["added"] += added
                 else:
-                    logging.error("Failed to save database")
+                    stats["failed"] += len(self._new_students)
+                    logging.warning(f"Failed to add {len(self._new_students)} students to database")
+
+            if self.incremental:
+                self._remove_departed_students()
+
+        # Print summary
+        print(f"\n===== SCRAPING SUMMARY =====")
+        print(f"Total users processed: {stats['processed']}")
+        print(f"Students added to database: {stats['added']}")
+        print(f"Failed/skipped: {stats['failed']}")
+        if self.incremental:
+            print(f"Unchanged (not re-fetched): {stats['unchanged']}")
+            print(f"Removed (left the course): {stats['removed']}")
+        print(f"Database size: {self.student_db.size()}")
+        if self.cache:
+            print(f"Profile cache: {self.cache.stats()}")
+        print(f"Files saved in: {os.path.abspath(self.data_dir)}/")
+        print(f"  - Database: {os.path.basename(self.student_db.db_file)}")
+        print(f"  - Text file: {os.path.basename(self.output_file)}")
+
+        logging.info(f"User data written to {self.output_file}")
+
+        print(f"Students processed: {stats['added']}")
+        print(f"Database size: {self.student_db.size()}")
+
+        # Save database to file
+        if self.student_db.size() > 0:
+            with self.metrics.timer("database save"):
+                success = self.student_db.save_to_file()
+            if success:
+                logging.info(f"Database saved with {self.student_db.size()} students")
             else:
-                logging.warning("No students to save to database")
+                logging.error("Failed to save database")
+        else:
+            logging.warning("No students to save to database")
 
-        return True
+        self.metrics.print_report()
+
+    def _remove_departed_students(self):
+        """Remove students that are no longer in the course's user list"""
+        if not self.user_list_complete:
+            logging.warning("User list was incomplete, keeping students that were not seen")
+            return
+
+        departed = [student for student in self.student_db.get_all_students()
+                    if student.db_id not in self._seen_db_ids]
+        for student in departed:
+            if self.student_db.remove_student_by_id(student.user_id):
+                self._stats["removed"] += 1
+                logging.info(f"Removed {student.name} ({student.user_id}), no longer in the course")
+
+    def _unchanged_student(self, user):
+        """Return the stored Student for a user whose list entry has not changed, or None
+
+        Used by incremental scrapes to skip the profile request of known users.
+        """
+        if not self.incremental:
+            return None
+
+        try:
+            name, position, db_id, _ = self._parse_user_row(user)
+        except Exception:
+            return None
+
+        student = self.student_db.find_by_db_id(db_id)
+        if student and student.name == name and student.position == position:
+            return student
+        return None
+
+    def _safe_parse_user(self, user):
+        """Parse a user in a worker thread, returning the error instead of raising it"""
+        student = self._unchanged_student(user)
+        if student:
+            return student, None
+
+        try:
+            return self.parse_user(user), None
+        except Exception as e:
+            return None, e
+
+    def _fetch_profiles(self, user_list):
+        """Fetch and parse user profiles with a bounded pool of workers
+
+        Yields (user, user_data, error) tuples in the same order as user_list. At most
+        a few profiles per worker are in flight, so results are consumed as they arrive.
+        """
+        if self.workers == 1:
+            for user in user_list:
+                yield (user, *self._safe_parse_user(user))
+            return
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for user in user_list:
+                pending.append((user, executor.submit(self._safe_parse_user, user)))
+                if len(pending) >= self.workers * 2:
+                    user, future = pending.popleft()
+                    yield (user, *future.result())
+
+            while pending:
+                user, future = pending.popleft()
+                yield (user, *future.result())
 
     def search_student_by_id(self, user_id):
         """Search for a student by user ID"""
@@ -400,95 +710,72 @@ class ClassScraper:
     def parse_user(self, user):
         """Extract user information from user data"""
         try:
-            name = user["0"].split(">")[-2][:-3]
-            position = user["1"][7:-8]
-            db_id = user["DT_RowId"]
-
-            # Extract link more safely
-            link_parts = user["0"].split("href='/")
-            if len(link_parts) > 1:
-                link_part = link_parts[1].split("'>")[0]
-                link_part = link_part.split("&amp;")
-                link_part = link_part[0] + "&" + link_part[1]
-                # Remove the potentially problematic substring manipulation
-                link = f"{self.base_url}/{link_part}"
-            else:
-                raise ValueError("Could not extract user profile link")
+            name, position, db_id, link = self._parse_user_row(user)
 
             # Fetch user profile page
-            response = self.session.get(link)
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Extract User ID (student ID)
-            user_id_div = soup.find("div", class_="not_visible")
-            user_id = user_id_div.text if user_id_div else "N/A"
-
-            # Extract profile data
-            profile_div = soup.find("div", class_="profile-content-panel-text")
-            if not profile_div:
-                raise ValueError("Profile data not found")
-
-            # Initialize values
-            phone = ""
-            email = ""
-            department = "N/A"
-            date = "N/A"
-            years = "N/A"
-
-            # Each piece of information is in its own div with a span for the label
-            for div in profile_div.find_all("div", style="line-height:26px;"):
-                span = div.find("span")
-                if not span:
-                    continue
-
-                label = span.text.strip()
-                # Get the text content after the span (the value)
-                value = div.get_text().replace(span.get_text(), "", 1).strip()
-
-                if "Τηλέφωνο:" in label:  # Phone
-                    phone = value
-
-                elif "E-mail:" in label:  # Email
-                    # Handle the email that might be in a script
-                    email_link = div.find("a")
-                    if email_link:
-                        email = email_link.text.strip()
-                    else:
-                        email = value if value and value != "(e-mail address hidden)" else ""
-
-                elif "Κατηγορία:" in label:  # Department
-                    department = value
-
-                elif "Μέλος από:" in label:  # Registration date
-                    date = value
-                    # Extract just the year (4 digits)
-                    year_match = re.search(r'(\d{4})', value)
-                    if year_match:
-                        years = year_match.group(1)
-
-            # Calculate year
-            current_year = datetime.date.today().year
-            current_month = datetime.date.today().month
-            try:
-                years = str(current_year - int(years) + (1 if current_month >= 9 else 0))
-            except (ValueError, TypeError):
-                years = "N/A"
-
-            return {
-                "name": name,
-                "user_id": user_id,
-                "position": position,
-                "email": email,
-                "phone": phone,
-                "department": department,
-                "date": date,
-                "years": years,
-                "db_id": db_id
-            }
+            html = self._get_profile_page(link)
+            return self._parse_profile(html, name, position, db_id)
         except Exception as e:
             logging.warning(f"Error parsing user: {e}")
             raise
 
+    def _get_profile_page(self, url):
+        """Fetch a profile page, going through the response cache if there is one"""
+        if not self.cache:
+            return self._get(url).text
+
+        html = self.cache.get(url)
+        if html is not None:
+            return html
+
+        response = self._get(url, headers=self.cache.validators(url))
+        if response.status_code == 304:
+            html = self.cache.revalidate(url)
+            if html is not None:
+                return html
+            response = self._get(url)
+
+        self.cache.count_miss()
+        if response.status_code == 200:
+            self.cache.put(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.text
+
+    def _parse_user_row(self, user):
+        """Extract name, position, DB-ID and profile link from a user list row"""
+        name = user["0"].split(">")[-2][:-3]
+        position = user["1"][7:-8]
+        db_id = user["DT_RowId"]
+
+        # Extract link more safely
+        link_parts = user["0"].split("href='/")
+        if len(link_parts) > 1:
+            link_part = link_parts[1].split("'>")[0]
+            link_part = link_part.split("&amp;")
+            link_part = link_part[0] + "&" + link_part[1]
+            # Remove the potentially problematic substring manipulation
+            link = f"{self.base_url}/{link_part}"
+        else:
+            raise ValueError("Could not extract user profile link")
+
+        return name, position, db_id, link
+
+    def _parse_profile(self, html, name, position, db_id):
+        """Extract the user's details from their profile page"""
+        with self.metrics.timer("parse"):
+            profile = parse_profile(html, self.parser)
+
+        return {
+            "name": name,
+            "user_id": profile["user_id"],
+            "position": position,
+            "email": profile["email"],
+            "phone": profile["phone"],
+            "department": profile["department"],
+            "date": profile["date"],
+            "years": profile["years"],
+            "db_id": db_id
+        }
+
     def format_user_info(self, user_data):
         """Format user information for output file"""
         lines = [
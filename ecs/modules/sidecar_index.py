@@ -0,0 +1,198 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from ecs.modules.Student import Student
+from ecs.modules.journal import journal_size
+
+
+# Layout of a sidecar index file (all integers little-endian):
+#   header:      magic, data file size, data file mtime (ns), user_id entries, name entries
+#   user_id table, sorted by user_id:      one entry per student
+#   name table, sorted by normalized name: one entry per student
+#   keys:        the UTF-8 bytes of every distinct key, pointed to by the entries
+# Every entry locates its key in the key area and its record in the data file, along
+# with the CRC32 of the record bytes.
+_MAGIC = b"ECSIDX1\n"
+_HEADER = struct.Struct("<8sQqII")
+_ENTRY = struct.Struct("<IHQII")  # key offset, key length, record offset, record length, record CRC32
+
+
+def sidecar_path(db_file):
+    """Path of the sidecar index of a database file"""
+    return db_file + ".idx"
+
+
+def write_sidecar(db_file, records):
+    """Write the sidecar index of a freshly saved database file
+
+    records are (user_id, normalized name, offset, length, crc32) tuples describing
+    where every student's record is in the data file.
+    """
+    stat = os.stat(db_file)
+
+    keys = bytearray()
+    key_positions = {}
+
+    def entry(key, offset, length, crc):
+        position = key_positions.get(key)
+        if position is None:
+            encoded = key.encode("utf-8")
+            position = key_positions[key] = (len(keys), len(encoded))
+            keys.extend(encoded)
+        return _ENTRY.pack(position[0], position[1], offset, length, crc)
+
+    # Keys are compared as UTF-8 bytes when searching, which orders like the strings
+    by_user_id = sorted(records, key=lambda record: record[0])
+    by_name = sorted(records, key=lambda record: (record[1], record[0]))
+    user_id_table = b"".join(entry(user_id, *location) for user_id, _, *location in by_user_id)
+    name_table = b"".join(entry(name_key, *location) for _, name_key, *location in by_name)
+
+    path = sidecar_path(db_file)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, stat.st_size, stat.st_mtime_ns, len(by_user_id), len(by_name)))
+        f.write(user_id_table)
+        f.write(name_table)
+        f.write(keys)
+    os.replace(temp_path, path)
+
+
+def remove_sidecar(db_file):
+    """Delete the sidecar index of a database file if there is one"""
+    try:
+        os.remove(sidecar_path(db_file))
+    except FileNotFoundError:
+        pass
+
+
+def open_sidecar(db_file):
+    """Open the sidecar index of a database file, or None if it is missing or out of date"""
+    try:
+        return SidecarIndex(db_file)
+    except (OSError, ValueError):
+        return None
+
+
+class SidecarIndex:
+    """Memory-mapped lookup index of a JSON database file, written by save_to_file
+
+    Finds the byte range of a student's record by binary search over the mapped
+    index, then reads and decodes only that record, so a lookup does not parse the
+    database. The index is refused if the data file's size or modification time
+    changed since it was written or the database has a journal, and every record
+    read is checked against its CRC32.
+    """
+    def __init__(self, db_file):
+        self.db_file = db_file
+        with open(sidecar_path(db_file), "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(self._map) < _HEADER.size:
+                raise ValueError("Truncated sidecar index")
+            magic, size, mtime_ns, user_ids, names = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise ValueError("Not a sidecar index")
+
+            stat = os.stat(db_file)
+            if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                raise ValueError("Sidecar index is out of date")
+            # Journaled changes are not in the data file yet
+            if journal_size(db_file):
+                raise ValueError("Database has journaled changes")
+        except Exception:
+            self._map.close()
+            raise
+
+        self.count = user_ids
+        self._user_id_table = _HEADER.size
+        self._name_table = self._user_id_table + user_ids * _ENTRY.size
+        self._names = names
+        self._keys = self._name_table + names * _ENTRY.size
+        self._data = None
+        self._user_id_entries = None  # user_id -> entry, filled by load_user_ids
+
+    def close(self):
+        self._map.close()
+        if self._data is not None:
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _entry(self, table, index):
+        return _ENTRY.unpack_from(self._map, table + index * _ENTRY.size)
+
+    def _key(self, table, index):
+        key_offset, key_length = self._entry(table, index)[:2]
+        start = self._keys + key_offset
+        return self._map[start:start + key_length]
+
+    def _find(self, table, count, key):
+        """Entries of a table whose key equals key"""
+        key = key.encode("utf-8")
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(table, middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        while low < count and self._key(table, low) == key:
+            entries.append(self._entry(table, low))
+            low += 1
+        return entries
+
+    def load_user_ids(self):
+        """Decode the whole user_id table into a dictionary
+
+        Later find_by_user_id calls are then dictionary lookups instead of binary
+        searches, which pays off for batches of thousands of lookups.
+        """
+        table = self._map[self._user_id_table:self._name_table]
+        keys = self._map[self._keys:]
+        self._user_id_entries = {}
+        for entry in _ENTRY.iter_unpack(table):
+            key_offset, key_length = entry[:2]
+            self._user_id_entries[keys[key_offset:key_offset + key_length].decode("utf-8")] = entry
+
+    def _read_student(self, entry):
+        """Decode the record an entry points to, raises ValueError if it does not match"""
+        _, _, offset, length, crc = entry
+        if self._data is None:
+            self._data = open(self.db_file, "rb")
+        self._data.seek(offset)
+        record = self._data.read(length)
+        if len(record) != length or zlib.crc32(record) != crc:
+            raise ValueError("Sidecar index does not match the database file")
+        return Student(**json.loads(record))
+
+    def find_by_user_id(self, user_id):
+        """Find student by user_id, accepting IDs with or without the 'p' prefix"""
+        # Try the exact ID, then with the 'p' prefix added or removed
+        if user_id.startswith('p'):
+            candidates = (user_id, user_id[1:])
+        else:
+            candidates = (user_id, 'p' + user_id)
+
+        for candidate in candidates:
+            if self._user_id_entries is not None:
+                entry = self._user_id_entries.get(candidate)
+                if entry:
+                    return self._read_student(entry)
+                continue
+            entries = self._find(self._user_id_table, self.count, candidate)
+            if entries:
+                return self._read_student(entries[0])
+        return None
+
+    def find_by_name(self, normalized_name):
+        """Find students by their normalized name (no accents, uppercase, single spaces)"""
+        return [self._read_student(entry) for entry in self._find(self._name_table, self._names, normalized_name)]
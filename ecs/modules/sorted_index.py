@@ -0,0 +1,212 @@
+from bisect import bisect_left, bisect_right
+
+
+class SortedIndex:
+    """Ordered mapping of unique keys to values, stored as a list of sorted chunks
+
+    Inserting or removing a key only shifts the entries of one chunk of at most
+    2 * load entries, located by a binary search over the chunk maxima, so both
+    cost O(log n) comparisons plus a small constant amount of copying. Iteration
+    yields (key, value) pairs in key order. Entries can also be accessed by rank
+    (index[i], index.rank(key)) and by key range (index.irange(low, high)).
+    """
+    def __init__(self, items=None, load=512):
+        self._load = load
+        self.clear()
+        if items is not None:
+            self.build(items)
+
+    def clear(self):
+        """Remove all entries"""
+        self._keys = []  # Sorted chunks of keys
+        self._values = []  # Values, chunked like their keys
+        self._maxes = []  # Largest key of every chunk
+        self._offsets = None  # Rank of the first entry of every chunk, rebuilt lazily
+        self._len = 0
+
+    def build(self, items):
+        """Replace the contents with (key, value) pairs, sorting them once"""
+        items = sorted(items, key=lambda item: item[0])
+        self.clear()
+        load = self._load
+        for start in range(0, len(items), load):
+            chunk = items[start:start + load]
+            self._keys.append([key for key, _ in chunk])
+            self._values.append([value for _, value in chunk])
+            self._maxes.append(chunk[-1][0])
+        self._len = len(items)
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __iter__(self):
+        for keys, values in zip(self._keys, self._values):
+            yield from zip(keys, values)
+
+    def __contains__(self, key):
+        return self._locate(key) is not None
+
+    def _locate(self, key):
+        """(chunk, position) of an existing key, or None"""
+        chunk = bisect_left(self._maxes, key)
+        if chunk == len(self._maxes):
+            return None
+        pos = bisect_left(self._keys[chunk], key)
+        if self._keys[chunk][pos] != key:
+            return None
+        return chunk, pos
+
+    def get(self, key, default=None):
+        """Value stored under key"""
+        location = self._locate(key)
+        if location is None:
+            return default
+        chunk, pos = location
+        return self._values[chunk][pos]
+
+    def add(self, key, value):
+        """Insert a key, replacing the value if the key already exists"""
+        self._offsets = None
+
+        if not self._maxes:
+            self._keys.append([key])
+            self._values.append([value])
+            self._maxes.append(key)
+            self._len = 1
+            return
+
+        chunk = bisect_left(self._maxes, key)
+        if chunk == len(self._maxes):
+            # Larger than every key, append to the last chunk
+            chunk -= 1
+            self._keys[chunk].append(key)
+            self._values[chunk].append(value)
+            self._maxes[chunk] = key
+        else:
+            keys = self._keys[chunk]
+            pos = bisect_left(keys, key)
+            if keys[pos] == key:
+                self._values[chunk][pos] = value
+                return
+            keys.insert(pos, key)
+            self._values[chunk].insert(pos, value)
+
+        self._len += 1
+
+        # Split chunks that grew too large
+        if len(self._keys[chunk]) > 2 * self._load:
+            load = self._load
+            keys, values = self._keys[chunk], self._values[chunk]
+            self._keys[chunk:chunk + 1] = [keys[:load], keys[load:]]
+            self._values[chunk:chunk + 1] = [values[:load], values[load:]]
+            self._maxes[chunk:chunk + 1] = [keys[load - 1], keys[-1]]
+
+    def remove(self, key):
+        """Remove a key and return its value, raises KeyError if it does not exist"""
+        location = self._locate(key)
+        if location is None:
+            raise KeyError(key)
+
+        chunk, pos = location
+        keys, values = self._keys[chunk], self._values[chunk]
+        del keys[pos]
+        value = values.pop(pos)
+        self._len -= 1
+        self._offsets = None
+
+        if not keys:
+            del self._keys[chunk]
+            del self._values[chunk]
+            del self._maxes[chunk]
+        else:
+            self._maxes[chunk] = keys[-1]
+            # Merge small chunks into their neighbour to keep lookups logarithmic
+            if len(keys) < self._load // 2 and len(self._keys) > 1:
+                self._merge(chunk)
+
+        return value
+
+    def _merge(self, chunk):
+        """Merge a chunk with its successor (or predecessor for the last chunk)"""
+        if chunk == len(self._keys) - 1:
+            chunk -= 1
+        keys = self._keys[chunk] + self._keys[chunk + 1]
+        values = self._values[chunk] + self._values[chunk + 1]
+        self._keys[chunk:chunk + 2] = [keys]
+        self._values[chunk:chunk + 2] = [values]
+        self._maxes[chunk:chunk + 2] = [keys[-1]]
+
+        if len(keys) > 2 * self._load:
+            half = len(keys) // 2
+            self._keys[chunk:chunk + 1] = [keys[:half], keys[half:]]
+            self._values[chunk:chunk + 1] = [values[:half], values[half:]]
+            self._maxes[chunk:chunk + 1] = [keys[half - 1], keys[-1]]
+
+    def _chunk_offsets(self):
+        """Rank of the first entry of every chunk"""
+        if self._offsets is None:
+            offsets = []
+            total = 0
+            for keys in self._keys:
+                offsets.append(total)
+                total += len(keys)
+            self._offsets = offsets
+        return self._offsets
+
+    def rank(self, key):
+        """Number of keys smaller than key"""
+        chunk = bisect_left(self._maxes, key)
+        if chunk == len(self._maxes):
+            return self._len
+        return self._chunk_offsets()[chunk] + bisect_left(self._keys[chunk], key)
+
+    def __getitem__(self, index):
+        """(key, value) pair at a rank"""
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedIndex index out of range")
+
+        offsets = self._chunk_offsets()
+        chunk = bisect_right(offsets, index) - 1
+        pos = index - offsets[chunk]
+        return self._keys[chunk][pos], self._values[chunk][pos]
+
+    def irange(self, low=None, high=None, inclusive=(True, True)):
+        """Iterate over the (key, value) pairs with low <= key <= high in key order
+
+        Only the chunks that overlap the range are visited. Use None for an open end
+        and inclusive to exclude either bound.
+        """
+        if low is None:
+            chunk, pos = 0, 0
+        else:
+            chunk = bisect_left(self._maxes, low)
+            if chunk == len(self._maxes):
+                return
+            keys = self._keys[chunk]
+            pos = bisect_left(keys, low) if inclusive[0] else bisect_right(keys, low)
+
+        while chunk < len(self._keys):
+            keys, values = self._keys[chunk], self._values[chunk]
+            while pos < len(keys):
+                key = keys[pos]
+                if high is not None and (key > high or (key == high and not inclusive[1])):
+                    return
+                yield key, values[pos]
+                pos += 1
+            chunk += 1
+            pos = 0
+
+    def keys(self):
+        """Iterate over the keys in order"""
+        for keys in self._keys:
+            yield from keys
+
+    def values(self):
+        """Iterate over the values in key order"""
+        for values in self._values:
+            yield from values
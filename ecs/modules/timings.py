@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+
+class Timings:
+    """Wall time of the phases of an ecs command, printed with --timings or ECS_TIMINGS=1
+
+    Every mark() ends a phase that started at the previous mark (or when the object
+    was created), so a command only has to mark the points between its phases.
+    """
+    def __init__(self, start=None):
+        self.enabled = os.environ.get("ECS_TIMINGS", "") not in ("", "0")
+        self._start = time.perf_counter() if start is None else start
+        self._last = self._start
+        self._phases = []  # (name, seconds)
+
+    def mark(self, name):
+        """End the current phase and name it"""
+        now = time.perf_counter()
+        self._phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self):
+        """Print the phases and the total to standard error, so they don't mix with the results"""
+        if not self.enabled:
+            return
+        self.mark("rest")
+        print("\nTimings:", file=sys.stderr)
+        for name, seconds in self._phases:
+            print(f"  {name:<24} {seconds * 1000:>9.1f} ms", file=sys.stderr)
+        print(f"  {'total':<24} {(self._last - self._start) * 1000:>9.1f} ms", file=sys.stderr)
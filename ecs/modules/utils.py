@@ -1,27 +1,78 @@
+import email.utils
+import gc
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Greek accented letters and their unaccented forms
+_GREEK_ACCENTS = {
+    # Lowercase with tonos
+    'ά': 'α', 'έ': 'ε', 'ή': 'η', 'ί': 'ι', 'ό': 'ο', 'ύ': 'υ', 'ώ': 'ω',
+    # Uppercase with tonos
+    'Ά': 'Α', 'Έ': 'Ε', 'Ή': 'Η', 'Ί': 'Ι', 'Ό': 'Ο', 'Ύ': 'Υ', 'Ώ': 'Ω',
+    # With dialytika and tonos
+    'ΐ': 'ι', 'ΰ': 'υ',
+    # With dialytika only
+    'ϊ': 'ι', 'ϋ': 'υ', 'Ϊ': 'Ι', 'Ϋ': 'Υ'
+}
+
+# str.translate table indexed by code point, covering Latin and Greek (up to U+03FF).
+# A list lookup is about twice as fast as the dictionary str.maketrans builds, and
+# characters past its end are left as they are.
+_ACCENT_TABLE = list(range(0x400))
+for _accented, _unaccented in _GREEK_ACCENTS.items():
+    _ACCENT_TABLE[ord(_accented)] = ord(_unaccented)
+
 
 def remove_greek_accents(text: str) -> str:
     """
     Remove Greek accents from text.
     """
-    # Greek accent mappings
-    accent_map = {
-        # Lowercase with tonos
-        'ά': 'α', 'έ': 'ε', 'ή': 'η', 'ί': 'ι', 'ό': 'ο', 'ύ': 'υ', 'ώ': 'ω',
-        # Uppercase with tonos
-        'Ά': 'Α', 'Έ': 'Ε', 'Ή': 'Η', 'Ί': 'Ι', 'Ό': 'Ο', 'Ύ': 'Υ', 'Ώ': 'Ω',
-        # With dialytika and tonos
-        'ΐ': 'ι', 'ΰ': 'υ',
-        # With dialytika only
-        'ϊ': 'ι', 'ϋ': 'υ', 'Ϊ': 'Ι', 'Ϋ': 'Υ'
-    }
-
-    result = text
-    for accented, unaccented in accent_map.items():
-        result = result.replace(accented, unaccented)
+    return text.translate(_ACCENT_TABLE)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Key a name is indexed and searched by: no Greek accents, uppercase, single spaces.
+    """
+    # Accents are removed first, since uppercasing 'ΐ' or 'ΰ' gives combining characters
+    return " ".join(name.translate(_ACCENT_TABLE).upper().split())
 
+
+def normalize_names(names):
+    """
+    Keys of many names, in order. Every distinct name is normalized once and equal
+    names share the same key string.
+    """
+    keys = {}
+    result = []
+    for name in names:
+        key = keys.get(name)
+        if key is None:
+            key = keys[name] = normalize_name(name)
+        result.append(key)
     return result
 
 
+@contextmanager
+def gc_paused():
+    """Suspend the cyclic garbage collector while many long-lived objects are created
+
+    Every few thousand allocations the collector runs, and its full collections walk
+    every tracked object, so building a large database spends much of its time in
+    collections that find no garbage.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 def progress_bar(progress, total, bar_length=60):
     """Display a more compact progress bar that updates in place
     
@@ -36,3 +87,61 @@ def progress_bar(progress, total, bar_length=60):
     
     # Use carriage return to reset cursor position, but don't add a newline
     print(f"\r|{bar}| {percent:.1f}%", end="", flush=True)
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most `rate` per second
+
+    Args:
+        rate: Maximum number of calls per second (0 or None disables the limit)
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserve the next call slot and return how many seconds the caller has to wait for it"""
+        if not self.interval:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        return slot - now
+
+    def wait(self):
+        """Block until the caller is allowed to make the next call"""
+        # The slot is reserved under the lock, the sleep happens outside of it so other threads can queue up
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Status codes of responses that are worth retrying: throttling and server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def retry_delay(attempt, retry_after=None, base=0.5, cap=30.0):
+    """Seconds to wait before retrying a failed request
+
+    Args:
+        attempt: Number of earlier retries of the request (0 for the first retry)
+        retry_after: Value of the response's Retry-After header, in seconds or an HTTP date
+        base: Delay of the first retry when the server did not ask for one
+        cap: Maximum delay
+    """
+    if retry_after:
+        try:
+            return min(cap, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(retry_after).timestamp()
+                return min(cap, max(0.0, when - time.time()))
+            except (TypeError, ValueError):
+                pass
+
+    # Exponential backoff with full jitter, so workers that failed together don't retry together
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -8,6 +8,9 @@ setup(
         "requests",
         "beautifulsoup4"
     ],
+    extras_require={
+        "async": ["aiohttp"]
+    },
     entry_points={
         "console_scripts": [
             "ecs=ecs.cli:main"